@@ -2,214 +2,99 @@
 #                                       BIBLIOTECA
 # ===========================================================================================
 
-import pandas as pd
-import numpy as np
-import plotly.express as px
 import folium
 import streamlit as st
-import datetime
-import inflection
+import streamlit.components.v1 as components
 
-from haversine import haversine
 from PIL import Image
-from streamlit_folium import folium_static
-from folium.plugins import MarkerCluster
+from streamlit_folium import st_folium
+
+from utils.data import DEFAULT_COUNTRIES
+from utils.export import EXPORT_FORMATS, export_path, get_export
+from utils.geo import WORLD_BOUNDS
+from utils.maps import MAP_COLUMNS, DeckSpec, build_map, deck_from_data, map_html, viewport_layer
+from utils.stages import DependencyGraph
+from utils.store import current_dataset
+from utils.timing import finish_timer, span, start_timer
 
 st.set_page_config(page_title='Fome Zero', layout='wide')
+start_timer('Home')
 # ===========================================================================================
 #                                       VARIÁVEIS
 # ===========================================================================================
 
-COUNTRIES = {
-   1: "India",
-   14: "Australia",
-   30: "Brazil",
-   37: "Canada",
-   94: "Indonesia",
-   148: "New Zeland",
-   162: "Philippines",
-   166: "Qatar",
-   184: "Singapure",
-   189: "South Africa",
-   191: "Sri Lanka",
-   208: "Turkey",
-   214: "United Arab Emirates",
-   215: "England",
-   216: "United States of America",
-}
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-
-COLORS = {
-   "3F7E00": "darkgreen",
-   "5BA829": "green",
-   "9ACD32": "lightgreen",
-   "CDD614": "orange",
-   "FFBA00": "red",
-   "CBCBC8": "darkred",
-   "FF7800": "darkred",
-}
+# De quais entradas cada seção depende: as métricas são do dataset inteiro e só
+# mudam com a versão dos dados; o mapa não muda com o formato do export.
+SECOES = DependencyGraph('home', {
+    'metricas': ['version'],
+    'mapa': ['version', 'countries'],
+    'mapa_pydeck': ['version', 'countries', 'layer'],
+}, large=['mapa', 'mapa_pydeck'])
 
 # ===========================================================================================
 #                                       FUNÇÕES
 # ===========================================================================================
 
-def rename_columns(df):
-    df = df.copy()
-    title = lambda x: inflection.titleize(x) 
-    snakecase = lambda x: inflection.underscore(x) 
-    spaces = lambda x: x.replace(" ", "")
-    cols_old = list(df.columns)
-    cols_old = list(map(title, cols_old))
-    cols_old = list(map(spaces, cols_old)) 
-    cols_new = list(map(snakecase, cols_old))
-    df.columns = cols_new
-    return df
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-def country_name(country_id):
-    return COUNTRIES[country_id]
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-def create_price_tye(price_range):
-    if price_range == 1:
-        return "cheap"
-    elif price_range == 2: 
-        return "normal"
-    elif price_range == 3: 
-        return "expensive"
-    else:
-        return "gourmet"
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-def color_name(color_code): 
-    return COLORS[color_code]
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-def adjust_columns_order(dataframe):
-    df = dataframe.copy()
-
-    new_cols_order = [
-        "restaurant_id",
-        "restaurant_name",
-        "country",
-        "city",
-        "address",
-        "locality",
-        "locality_verbose",
-        "longitude",
-        "latitude",
-        "cuisines",
-        "price_type",
-        "average_cost_for_two",
-        "currency",
-        "has_table_booking",
-        "has_online_delivery",
-        "is_delivering_now",
-        "aggregate_rating",
-        "rating_color",
-        "color_name",
-        "rating_text",
-        "votes",
-    ]
-
-    return df.loc[:, new_cols_order]
-
+def create_map(html):
+    # HTML pronto do cache: o mesmo srcdoc a cada rerun, então o navegador não
+    # recarrega o mapa quando muda um widget de que ele não depende
+    with span('components_html'):
+        components.html(html, width=1024, height=768 + 10)
 # ------------------------------------------------------------------------------------------------------------------------------------------------
-def clean_code(df1):
-    df1 = df1.dropna()
-    df1["country"] = df1.loc[:, "country_code"].apply(lambda x: country_name(x))
-    df1["price_type"] = df1.loc[:, "price_range"].apply(lambda x: create_price_tye(x))
-    df1["color_name"] = df1.loc[:, "rating_color"].apply(lambda x: color_name(x))
-    df1["cuisines"] = df1.loc[:, "cuisines"].apply(lambda x: x.split(",")[0])    
-    return df1
+def create_deck_map(views, layer, version, countries):
+    # Mapa desenhado pela GPU a partir dos pontos pré-calculados de cada país; só
+    # o JSON do mapa pronto fica em cache (limitado por bytes), então reruns com a
+    # mesma seleção não o montam de novo.
+    with span('build_deck'):
+        deck = SECOES.stage('mapa_pydeck', lambda: DeckSpec(deck_from_data(views.deck_data(countries), layer)),
+                            version=version, countries=countries, layer=layer)
+
+    with span('pydeck_chart'):
+        st.pydeck_chart(deck, use_container_width=True)
 # ------------------------------------------------------------------------------------------------------------------------------------------------
-
-def figura1(df1):
-    df_aux = np.round(df1.loc[:,['country', 'restaurant_id']].groupby('country').nunique().sort_values('restaurant_id',ascending=False).reset_index(),2)
-    fig = px.bar(df_aux, 'country', y='restaurant_id', text="restaurant_id",
-                 title="Quantidade de Restaurantes Registrados por País",
-                 labels={"country": "Países", "restaurant_id": "Quantidade de Restaurantes",}
-                )
-    return fig 
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-def figura2(df1):
-    df_aux = df1.loc[:,['country', 'city']].groupby('country').nunique().sort_values('city',ascending=False).reset_index()
-    fig = px.bar(df_aux, 'country', y='city', text="city",
-                 title="Quantidade de cidades Registrados por País",
-                 labels={"country": "Países", "city": "Quantidade de cidades",}
-                )
-    return fig 
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-def figura3(df1):
-    df_aux = np.round(df1.loc[:,['country', 'votes']].groupby('country').mean().sort_values('votes',ascending=False).reset_index(),2)
-    fig = px.bar(df_aux, 'country', y='votes', text="votes",
-                 title="Média de avaliação por País",
-                 labels={"country": "Países", "votes": "Quantidade de votos",}
-                )
-    return fig 
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-def figura4(df1):
-    df_aux = np.round(df1.loc[:,['country', 'average_cost_for_two']].groupby('country').mean().sort_values('average_cost_for_two',ascending=False).reset_index(),2)
-    fig = px.bar(df_aux, 'country', y='average_cost_for_two', text="average_cost_for_two",
-             title="Quantidade de Restaurantes Registrados por País",
-             labels={"country": "Países", "average_cost_for_two": "Média de preço para dois",}
-            )
-    return fig
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-
-def create_map(dataframe):
-    f = folium.Figure(width=1920, height=1080)
-
-    m = folium.Map(max_bounds=True).add_to(f)
-
-    marker_cluster = MarkerCluster().add_to(m)
-
-    for _, line in dataframe.iterrows():
-
-        name = line["restaurant_name"]
-        price_for_two = line["average_cost_for_two"]
-        cuisine = line["cuisines"]
-        currency = line["currency"]
-        rating = line["aggregate_rating"]
-        color = f'{line["color_name"]}'
-
-        html = "<p><strong>{}</strong></p>"
-        html += "<p>Price: {},00 ({}) para dois"
-        html += "<br />Type: {}"
-        html += "<br />Aggragate Rating: {}/5.0"
-        html = html.format(name, price_for_two, currency, cuisine, rating)
-
-        popup = folium.Popup(
-            folium.Html(html, script=True),
-            max_width=500,
+def create_viewport_map(dataframe, country_clusters, countries):
+    # O servidor envia apenas os agrupamentos/pontos da área visível. A cada
+    # movimento do mapa o st_folium devolve a nova área e a camada é refeita.
+    view = st.session_state.get('map_view', {'bounds': WORLD_BOUNDS, 'zoom': 2})
+    with span('cluster_query'):
+        clusters, rows = country_clusters.query(countries, view['bounds'], view['zoom'])
+
+    with span('viewport_layer'):
+        layer = viewport_layer(clusters, dataframe[MAP_COLUMNS].take(rows))
+
+    m = folium.Map(location=[0, 0], zoom_start=2, max_bounds=True)
+    with span('st_folium'):
+        output = st_folium(
+            m,
+            key='mapa_area_visivel',
+            feature_group_to_add=layer,
+            returned_objects=['bounds', 'zoom'],
+            width=1024,
+            height=768,
         )
 
-        folium.Marker(
-            [line["latitude"], line["longitude"]],
-            popup=popup,
-            icon=folium.Icon(color=color, icon="home", prefix="fa"),
-        ).add_to(marker_cluster)
-
-    folium_static(m, width=1024, height=768)
+    bounds = (output or {}).get('bounds') or {}
+    if bounds.get('_southWest') and bounds['_southWest'].get('lat') is not None:
+        new_view = {
+            'bounds': (bounds['_southWest']['lat'], max(bounds['_southWest']['lng'], -180.0),
+                       bounds['_northEast']['lat'], min(bounds['_northEast']['lng'], 180.0)),
+            'zoom': output.get('zoom') or view['zoom'],
+        }
+        if new_view != view:
+            st.session_state['map_view'] = new_view
+            st.rerun()
 
 
 # ===========================================================================================
 #                               INICIO DA ESTRUTURA LÓGICA
 # ===========================================================================================
 
-# Importando o Data set
-df = pd.read_csv('dataset/zomato.csv')
-
-# Renomeando as Colunas
-df = rename_columns(df)
-
-# Limpeza dos dados
-
-df = clean_code(df)
-
-# Organizando as Colunas
-
-df1 = adjust_columns_order(df)
-
-# cópia do código
-
-df1 = df.copy()
+# Versão atual dos dados tratados e dos índices dos filtros; o rerun inteiro usa
+# esta mesma versão mesmo que uma atualização seja publicada no meio dele
+with span('dataset'):
+    dataset = current_dataset()
+    df1 = dataset.frame()
+    indexes = dataset.indexes
 
 # =====================================================================================
 #                           BARRA LATERAL
@@ -227,27 +112,50 @@ st.sidebar.markdown('## Selecione um País')
 
 data_select = st.sidebar.multiselect(
     'Quais os países ?',
-    df1.loc[:, 'country'].unique().tolist(),
-    default=["Brazil", "England", "Qatar", "South Africa", "Canada", "Australia"])
+    indexes['country'].values,
+    default=DEFAULT_COUNTRIES)
+
+map_mode = st.sidebar.radio(
+    'Modo do mapa',
+    ['Agrupado no navegador', 'Agrupado no servidor (área visível)', 'WebGL (pydeck)'])
+
+if map_mode == 'WebGL (pydeck)':
+    deck_layer = st.sidebar.radio('Camada', ['Pontos', 'Hexágonos'], horizontal=True)
 
 st.sidebar.markdown("""---""")
 st.sidebar.markdown('Dados Tratados:')
 
-st.sidebar.download_button(
-        label="Download",
-        data=df1.to_csv(index=False, sep=";"),
-        file_name="data.csv",
-        mime="text/csv",
-    )
+# O arquivo só é gerado quando alguém pede, fica em cache em disco por versão
+# dos dados, seleção de países e formato, e é escrito em blocos. Só a sessão que
+# pediu recebe o botão de download: o download_button lê o arquivo inteiro para a
+# memória do servidor a cada rerun em que aparece.
+export_format = st.sidebar.selectbox('Formato', list(EXPORT_FORMATS))
+export_file = export_path(dataset.version, data_select, export_format)
+
+pedido = st.session_state.get('export_pedido') == str(export_file)
+if not pedido and st.sidebar.button('Preparar download'):
+    st.session_state['export_pedido'] = str(export_file)
+    pedido = True
+
+if pedido:
+    rows = indexes['country'].rows(indexes['country'].select(data_select))
+    with span('get_export'):
+        export_data = get_export(dataset.take_all, rows, export_format, dataset.version, data_select)
+    extension, mime = EXPORT_FORMATS[export_format]
+    with export_data as data:
+        if st.sidebar.download_button(
+                label="Download",
+                data=data,
+                file_name=f"data{extension}",
+                mime=mime,
+            ):
+            # Baixado: o botão (e o arquivo na memória) some no próximo rerun
+            del st.session_state['export_pedido']
 
 
 st.sidebar.markdown("""---""")
 st.sidebar.markdown('#### Feito por Henrique Kubo')
 
-# Filtro de País
-#linhas_selecionadas = df1['country'].isin(data_select)
-#df1 = df1.loc[linhas_selecionadas, :]
-
 # =====================================================================================
 #                           LAYOUT STREAMNLIT
 # =====================================================================================
@@ -255,29 +163,42 @@ st.header('Fome Zero !')
 st.subheader('O Melhor lugar para encontrar seu mais novo restaurante favorito!')
 st.markdown('---')
 
-with st.container():
+with st.container(), span('metrics'):
     st.markdown('Temos as seguintes marcas dentro da nossa plataforma:')
 
+    metricas = SECOES.stage('metricas', lambda: {
+        'rest_cad': len(df1),
+        'pais_cad': df1.loc[:,'country'].nunique(),
+        'cid_cad': df1.loc[:,'city'].nunique(),
+        'ava_cad': df1.loc[:,'votes'].sum(),
+        'culi': df1.loc[:,'cuisines'].nunique(),
+    }, version=dataset.version)
+
     col1, col2, col3, col4, col5 = st.columns(5)
 
     with col1:
-        rest_cad = df1['restaurant_id'].nunique()
-        col1.metric('Restaurantes Cadastrados', rest_cad)
+        col1.metric('Restaurantes Cadastrados', metricas['rest_cad'])
     with col2:
-        pais_cad = df1.loc[:,'country'].nunique()
-        col2.metric('Países Cadastrados', pais_cad)
+        col2.metric('Países Cadastrados', metricas['pais_cad'])
     with col3:
-        cid_cad = df1.loc[:,'city'].nunique()
-        col3.metric('Cidades Cadastrados', cid_cad)
+        col3.metric('Cidades Cadastrados', metricas['cid_cad'])
     with col4:
-        ava_cad = df1.loc[:,'votes'].sum()
-        col4.metric('Total Avaliações Feitas', ava_cad)
+        col4.metric('Total Avaliações Feitas', metricas['ava_cad'])
     with col5:
-        culi = df1.loc[:,'cuisines'].nunique()
-        col5.metric('Culinárias Oferecidas', culi)
+        col5.metric('Culinárias Oferecidas', metricas['culi'])
 
 st.markdown('---')
 
-map_df = df1.loc[df1["country"].isin(data_select), :]
+with span('map'):
+    if map_mode == 'Agrupado no servidor (área visível)':
+        create_viewport_map(df1, dataset.country_clusters, data_select)
+    elif map_mode == 'WebGL (pydeck)':
+        create_deck_map(dataset.views, deck_layer, dataset.version, data_select)
+    else:
+        with span('build_map'):
+            html = SECOES.stage('mapa', lambda: map_html(build_map(
+                df1[MAP_COLUMNS].take(indexes['country'].rows(indexes['country'].select(data_select))))),
+                version=dataset.version, countries=data_select)
+        create_map(html)
 
-create_map(df1)
\ No newline at end of file
+finish_timer({'countries': data_select, 'map_mode': map_mode, 'export_format': export_format})
\ No newline at end of file
@@ -0,0 +1,86 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import argparse
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.common import best_of, synthetic_csv
+from utils import arrow_query
+from utils import cube as pandas_query
+from utils.charts import cuisine_ratings
+from utils.data import DATASET_PATH, load_dataset
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def cube_queries(query, cube, countries):
+    # As consultas das páginas Países e Cidades para uma seleção de países.
+    cube = query.select_countries(cube, countries)
+    return [
+        query.restaurants_by_country(cube),
+        query.cities_by_country(cube),
+        query.mean_by_country(cube, "votes", "votes"),
+        query.mean_by_country(cube, "cost_for_two", "average_cost_for_two"),
+        query.restaurants_by_city(cube),
+        query.restaurants_by_city(cube, "rating_above_4"),
+        query.restaurants_by_city(cube, "rating_below_2_5"),
+        query.cuisines_by_city(cube),
+    ]
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def pandas_ratings(df, countries, cuisines):
+    return cuisine_ratings(df.loc[df["country"].isin(countries) & df["cuisines"].isin(cuisines)])
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def arrow_ratings(table, countries, cuisines):
+    # Como na página Culinária: só as colunas usadas passam pelo filtro
+    table = table.select(["country", "cuisines", "aggregate_rating"])
+    return arrow_query.cuisine_ratings(arrow_query.select_rows(table, country=countries, cuisines=cuisines))
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def measure(df, repeat):
+    # Tempos (s) de cada etapa nos dois backends; os resultados precisam ser iguais.
+    countries = list(df["country"].cat.categories)
+    cuisines = list(df["cuisines"].cat.categories)
+    table = arrow_query.to_table(df)
+
+    times = {}
+    times["build_cube"] = [best_of(pandas_query.build_cube, df, repeat=repeat),
+                           best_of(arrow_query.build_cube, df, repeat=repeat)]
+    cube = times["build_cube"][0][1]
+    pd.testing.assert_frame_equal(cube, times["build_cube"][1][1])
+
+    times["consultas"] = [best_of(cube_queries, pandas_query, cube, countries, repeat=repeat),
+                          best_of(cube_queries, arrow_query, arrow_query.cube_table(cube), countries, repeat=repeat)]
+    for expected, result in zip(*(r for _, r in times["consultas"])):
+        pd.testing.assert_frame_equal(result, expected, check_categorical=False)
+
+    times["cuisine_ratings"] = [best_of(pandas_ratings, df, countries, cuisines, repeat=repeat),
+                                best_of(arrow_ratings, table, countries, cuisines, repeat=repeat)]
+    pd.testing.assert_frame_equal(times["cuisine_ratings"][1][1], times["cuisine_ratings"][0][1],
+                                  check_categorical=False)
+    return {stage: (pandas_run[0], arrow_run[0]) for stage, (pandas_run, arrow_run) in times.items()}
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Compara as agregações das páginas nos backends pandas e arrow.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    base = pd.read_csv(DATASET_PATH)
+
+    print(f"{'linhas':>10} {'etapa':<16} {'pandas':>10} {'arrow':>10} {'speedup':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for factor in args.scales:
+            csv_path = Path(tmp) / f"zomato_x{factor}.csv"
+            synthetic_csv(base, factor).to_csv(csv_path, index=False)
+            df = load_dataset(csv_path)
+            for stage, (t_pandas, t_arrow) in measure(df, args.repeat).items():
+                print(f"{len(df):>10} {stage:<16} {t_pandas * 1000:>8.1f}ms {t_arrow * 1000:>8.1f}ms "
+                      f"{t_pandas / t_arrow:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
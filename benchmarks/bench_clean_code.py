@@ -0,0 +1,48 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import argparse
+
+import pandas as pd
+
+from benchmarks.common import best_of, raw_frame, scale_frame
+from utils.data import clean_code, color_name, country_name, create_price_tye
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def clean_code_rowwise(df1):
+    # Versão original, linha a linha, mantida apenas como referência do benchmark.
+    df1 = df1.dropna().copy()
+    df1["country"] = df1.loc[:, "country_code"].apply(lambda x: country_name(x))
+    df1["price_type"] = df1.loc[:, "price_range"].apply(lambda x: create_price_tye(x))
+    df1["color_name"] = df1.loc[:, "rating_color"].apply(lambda x: color_name(x))
+    df1["cuisines"] = df1.loc[:, "cuisines"].apply(lambda x: x.split(",")[0])
+    return df1
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Compara o clean_code vetorizado com a versão linha a linha.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    base = raw_frame()
+
+    print(f"{'linhas':>10} {'linha a linha':>15} {'vetorizado':>12} {'speedup':>9}")
+    for factor in args.scales:
+        df = scale_frame(base, factor)
+
+        t_rowwise, expected = best_of(clean_code_rowwise, df, repeat=args.repeat)
+        t_vector, result = best_of(clean_code, df, repeat=args.repeat)
+
+        # A saída precisa ser idêntica, inclusive byte a byte quando exportada.
+        pd.testing.assert_frame_equal(result, expected)
+        assert result.to_csv(index=False) == expected.to_csv(index=False)
+
+        print(f"{len(df):>10} {t_rowwise * 1000:>13.1f}ms {t_vector * 1000:>10.1f}ms {t_rowwise / t_vector:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import argparse
+
+import folium
+from folium.plugins import MarkerCluster
+
+from benchmarks.common import best_of, sample_points
+from utils.data import load_dataset
+from utils.maps import build_map
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def build_map_iterrows(dataframe):
+    # Versão original do create_map (um folium.Marker + Popup por linha),
+    # mantida apenas como referência do benchmark.
+    f = folium.Figure(width=1920, height=1080)
+    m = folium.Map(max_bounds=True).add_to(f)
+    marker_cluster = MarkerCluster().add_to(m)
+    for _, line in dataframe.iterrows():
+        html = "<p><strong>{}</strong></p>"
+        html += "<p>Price: {},00 ({}) para dois"
+        html += "<br />Type: {}"
+        html += "<br />Aggragate Rating: {}/5.0"
+        html = html.format(line["restaurant_name"], line["average_cost_for_two"], line["currency"],
+                           line["cuisines"], line["aggregate_rating"])
+        popup = folium.Popup(folium.Html(html, script=True), max_width=500)
+        folium.Marker(
+            [line["latitude"], line["longitude"]],
+            popup=popup,
+            icon=folium.Icon(color=f'{line["color_name"]}', icon="home", prefix="fa"),
+        ).add_to(marker_cluster)
+    return m
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def render(build, dataframe):
+    # Tempo total até o HTML que o folium_static envia ao navegador.
+    return build(dataframe).get_root().render()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Mede a geração do HTML do mapa da Home.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=10_000,
+                        help="maior quantidade de pontos medida também com a versão iterrows")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    base = load_dataset()
+
+    print(f"{'pontos':>10} {'iterrows':>12} {'em lote':>10} {'HTML em lote':>14}")
+    for size in args.sizes:
+        df = sample_points(base, size)
+
+        t_bulk, html = best_of(render, build_map, df, repeat=args.repeat)
+        legacy = "-"
+        if size <= args.legacy_max:
+            t_legacy, _ = best_of(render, build_map_iterrows, df, repeat=args.repeat)
+            legacy = f"{t_legacy:.2f}s"
+
+        print(f"{size:>10} {legacy:>12} {t_bulk:>9.2f}s {len(html) / 1e6:>11.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
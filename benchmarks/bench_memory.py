@@ -0,0 +1,35 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import pandas as pd
+
+from utils.data import adjust_columns_order, clean_code, compact_dtypes, memory_footprint
+from benchmarks.common import raw_frame
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def main():
+    before = adjust_columns_order(clean_code(raw_frame()))
+    after = compact_dtypes(before)
+
+    report = pd.DataFrame({
+        "antes": memory_footprint(before),
+        "depois": memory_footprint(after),
+        "tipo": after.dtypes.astype(str).reindex(["Index", *after.columns], fill_value=""),
+    })
+    report.loc["TOTAL", ["antes", "depois"]] = report[["antes", "depois"]].sum()
+    report["redução"] = 1 - report["depois"] / report["antes"]
+
+    pd.set_option("display.width", 120)
+    print(report.to_string(formatters={
+        "antes": lambda x: f"{x / 1024:,.1f} KiB",
+        "depois": lambda x: f"{x / 1024:,.1f} KiB",
+        "redução": lambda x: f"{x:.0%}",
+    }))
+
+
+if __name__ == "__main__":
+    main()
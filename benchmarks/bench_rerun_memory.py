@@ -0,0 +1,139 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import argparse
+import ctypes
+import gc
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import psutil
+
+from benchmarks.common import peak_memory, synthetic_csv
+from utils.data import (DATASET_PATH, DEFAULT_COUNTRIES, adjust_columns_order, clean_code, compact_dtypes,
+                        deduplicate, load_dataset, rename_columns)
+from utils.index import build_indexes
+from utils.maps import MAP_COLUMNS
+from utils.topk import top_k
+from utils.views import TOP_COLUMNS, precompute_views
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+CUISINES = ["Home-made", "BBQ", "Japanese", "Brazilian", "Arabian", "American", "Italian"]
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def load_dataset_copying(path):
+    # Pipeline original, mantido apenas como referência do benchmark: cópia no
+    # rename, cópia no adjust_columns_order e a cópia `df1 = df.copy()` das páginas.
+    df = rename_columns(pd.read_csv(path)).copy()
+    df = deduplicate(clean_code(df))
+    df = adjust_columns_order(df.copy())
+    return compact_dtypes(df).copy()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def rerun_copying(df, countries, cuisines):
+    # Um rerun da Home (mapa) e da Culinária com os filtros por .loc sobre o frame inteiro
+    df1 = df.copy()
+    map_df = df1.loc[df1["country"].isin(countries), :]
+    df2 = df1.loc[df1["country"].isin(countries) & df1["cuisines"].isin(cuisines), :]
+    return map_df, df2.loc[:, TOP_COLUMNS]
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def rerun_views(df, indexes, views, countries, cuisines):
+    # O mesmo rerun com seleções por posição: só as colunas e linhas usadas são copiadas
+    map_df = df[MAP_COLUMNS].take(indexes["country"].rows(indexes["country"].select(countries)))
+    return map_df, views.select("top", countries, cuisines=cuisines)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def peak_rss():
+    # Pico de RSS (VmHWM) do processo, em bytes
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) * 1024 for line in status if line.startswith("VmHWM"))
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def reset_peak_rss():
+    # Devolve ao sistema a memória livre que sobrou da carga (senão os reruns a
+    # reaproveitam sem aparecer no RSS) e zera o VmHWM (Linux >= 4.0)
+    gc.collect()
+    ctypes.CDLL("libc.so.6").malloc_trim(0)
+    with open("/proc/self/clear_refs", "w") as refs:
+        refs.write("5")
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def session(mode, path, reruns):
+    # Uma sessão em um processo novo: a carga dos dados e `reruns` reruns. Devolve
+    # o pico de RSS de cada fase acima do RSS com que ela começou.
+    start = psutil.Process().memory_info().rss
+    if mode == "copias":
+        df = load_dataset_copying(path)
+        rerun = lambda: rerun_copying(df, DEFAULT_COUNTRIES, CUISINES)
+    else:
+        df = load_dataset(path)
+        indexes, views = build_indexes(df), precompute_views(df, workers=1)
+        rerun = lambda: rerun_views(df, indexes, views, DEFAULT_COUNTRIES, CUISINES)
+    load_peak = peak_rss() - start
+
+    reset_peak_rss()
+    start = psutil.Process().memory_info().rss
+    for _ in range(reruns):
+        rerun()
+    return {"carga": load_peak, "reruns": peak_rss() - start}
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def session_peak(mode, path, reruns):
+    output = subprocess.run([sys.executable, "-m", "benchmarks.bench_rerun_memory", "--session", mode,
+                             "--path", str(path), "--reruns", str(reruns)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Compara a memória da carga e dos reruns com e sem as cópias do dataset.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--session", choices=["copias", "visoes"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", type=Path, default=DATASET_PATH, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.session:
+        print(json.dumps(session(args.session, args.path, args.reruns)))
+        return
+
+    mib = lambda x: f"{x / 2**20:>8.1f}MiB"
+    base = pd.read_csv(DATASET_PATH)
+    print(f"{'linhas':>10} {'etapa':<14} {'cópias':>11} {'visões':>11} {'redução':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for factor in args.scales:
+            csv_path = Path(tmp) / f"zomato_x{factor}.csv"
+            synthetic_csv(base, factor).to_csv(csv_path, index=False)
+
+            # Pico alocado (tracemalloc) na carga e em um rerun; o frame e as
+            # visões do rerun já existem, como no servidor
+            df = load_dataset(csv_path)
+            indexes, views = build_indexes(df), precompute_views(df, workers=1)
+            pd.testing.assert_frame_equal(df, load_dataset_copying(csv_path))
+            copied, selected = rerun_copying(df, DEFAULT_COUNTRIES, CUISINES), \
+                rerun_views(df, indexes, views, DEFAULT_COUNTRIES, CUISINES)
+            pd.testing.assert_frame_equal(copied[0][MAP_COLUMNS], selected[0])
+            # As visões guardam só os melhores de cada (país, culinária): basta o top N sair igual
+            pd.testing.assert_frame_equal(top_k(copied[1], 10, "aggregate_rating", "restaurant_id"),
+                                          top_k(selected[1], 10, "aggregate_rating", "restaurant_id"))
+
+            stages = {
+                "carga": (peak_memory(load_dataset_copying, csv_path), peak_memory(load_dataset, csv_path)),
+                "rerun": (peak_memory(rerun_copying, df, DEFAULT_COUNTRIES, CUISINES),
+                          peak_memory(rerun_views, df, indexes, views, DEFAULT_COUNTRIES, CUISINES)),
+            }
+            # Pico de RSS de uma sessão em um processo novo, na carga e nos reruns
+            sessions = [session_peak("copias", csv_path, args.reruns), session_peak("visoes", csv_path, args.reruns)]
+            for phase in ("carga", "reruns"):
+                stages[f"RSS {phase}"] = tuple(s[phase] for s in sessions)
+            for stage, (before, after) in stages.items():
+                print(f"{len(df):>10} {stage:<14} {mib(before)} {mib(after)} {1 - after / before:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import math
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from utils.data import DATASET_PATH, rename_columns
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def best_of(func, *args, repeat=5, **kwargs):
+    # Menor tempo (em segundos) entre `repeat` execuções e o resultado da última.
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def peak_memory(func, *args, **kwargs):
+    # Pico de memória alocada (bytes) durante uma execução, medido com tracemalloc.
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def raw_frame(path=DATASET_PATH):
+    # Dataset bruto com as colunas já renomeadas, entrada do clean_code.
+    return rename_columns(pd.read_csv(path))
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def scale_frame(df, factor):
+    # Repete o dataset `factor` vezes para simular volumes maiores.
+    if factor == 1:
+        return df
+    return pd.concat([df] * factor, ignore_index=True)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def sample_points(df, size, seed=0):
+    # Amostra `size` restaurantes (com reposição) e desloca levemente as
+    # coordenadas para que os pontos não caiam todos no mesmo lugar do mapa.
+    rng = np.random.default_rng(seed)
+    sample = df.iloc[rng.integers(0, len(df), size)].reset_index(drop=True)
+    sample["latitude"] = sample["latitude"] + rng.normal(0, 0.01, size).astype("float32")
+    sample["longitude"] = sample["longitude"] + rng.normal(0, 0.01, size).astype("float32")
+    return sample
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def synthetic_csv(df_raw, factor, seed=0):
+    # Dataset bruto (colunas originais do CSV) com `factor` vezes mais linhas.
+    # As linhas são amostradas do dataset real, preservando a distribuição
+    # conjunta de país/cidade/culinária; cada uma ganha um restaurant_id novo.
+    # Países e culinárias mantêm a cardinalidade real e as cidades crescem com
+    # a raiz do fator (cidades vizinhas numeradas), como numa base maior.
+    if factor == 1:
+        return df_raw
+    rng = np.random.default_rng(seed)
+    size = len(df_raw) * factor
+    df = df_raw.iloc[rng.integers(0, len(df_raw), size)].reset_index(drop=True)
+
+    df["Restaurant ID"] = np.arange(1, size + 1)
+
+    variants = rng.integers(0, math.ceil(math.sqrt(factor)), size)
+    suffix = pd.Series(variants).map(lambda v: f" {v + 1}" if v else "")
+    df["City"] = df["City"] + suffix
+
+    df["Latitude"] = df["Latitude"] + rng.normal(0, 0.01, size)
+    df["Longitude"] = df["Longitude"] + rng.normal(0, 0.01, size)
+    return df
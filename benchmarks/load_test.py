@@ -0,0 +1,190 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import psutil
+from streamlit import source_util
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest, app_test
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+ROOT = Path(__file__).resolve().parent.parent
+GET_PAGES = source_util.get_pages
+
+COUNTRY_LABEL = 'Quais os países ?'
+CUISINE_LABEL = 'Quais culinárias ?'
+TOP_N_LABEL = 'Selecione a quantidade de Restaurantes que deseja visualizar'
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+class _SharedRuntime(type(Runtime)):
+    # O AppTest troca o Runtime global a cada execução e o zera ao terminar,
+    # derrubando as outras sessões que rodam ao mesmo tempo. Com esta classe o
+    # AppTest enxerga um Runtime cujo _instance não pode ser sobrescrito.
+    def __setattr__(cls, name, value):
+        if name != '_instance':
+            super().__setattr__(name, value)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def pages_of(main_script_path, cache={}):
+    # Lista de páginas por script. A original guarda um único resultado global,
+    # e sessões simultâneas de scripts diferentes acabariam rodando o mesmo.
+    with source_util._pages_cache_lock:
+        if main_script_path not in cache:
+            saved = source_util._cached_pages
+            source_util._cached_pages = None
+            cache[main_script_path] = GET_PAGES(main_script_path)
+            source_util._cached_pages = saved
+        return cache[main_script_path]
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def isolate_sessions():
+    # Um único Runtime simulado para todas as sessões, como num servidor real,
+    # e a lista de páginas resolvida por script.
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    app_test.Runtime = _SharedRuntime('SharedRuntime', (Runtime,), {})
+    source_util.get_pages = pages_of
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def change_countries(at, rng):
+    multiselect = widget(at.multiselect, COUNTRY_LABEL)
+    multiselect.set_value(rng.sample(multiselect.options, rng.randint(1, 6)))
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def change_cuisines(at, rng):
+    multiselect = widget(at.multiselect, CUISINE_LABEL)
+    multiselect.set_value(rng.sample(multiselect.options, rng.randint(1, 10)))
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def change_top_n(at, rng):
+    slider = widget(at.slider, TOP_N_LABEL)
+    slider.set_value(rng.randint(slider.min, slider.max))
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+# Interações possíveis em cada script; a cada rerun a sessão sorteia uma delas
+SCENARIOS = {
+    'Home.py': [change_countries],
+    'pages/1_visao_pais.py': [change_countries],
+    'pages/2_visao_cidades.py': [change_countries],
+    'pages/3_visao_culinaria.py': [change_countries, change_cuisines, change_top_n],
+}
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def run_session(script, reruns, seed, timeout):
+    # Uma sessão de navegador: abre o script e muda os filtros `reruns` vezes.
+    rng = random.Random(seed)
+    at = AppTest.from_file(str(ROOT / script), default_timeout=timeout)
+    samples, errors = [], []
+
+    for i in range(reruns + 1):
+        if i:
+            rng.choice(SCENARIOS[script])(at, rng)
+        start = time.perf_counter()
+        at.run()
+        samples.append({'script': script, 'first': i == 0, 'seconds': time.perf_counter() - start})
+        errors += [exception.value for exception in at.exception]
+    return samples, errors
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def sample_rss(stop, interval, rss):
+    process = psutil.Process()
+    while not stop.wait(interval):
+        rss.append(process.memory_info().rss)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def latency_summary(seconds):
+    p50, p95, p99 = np.percentile(seconds, [50, 95, 99]) * 1000
+    return {'reruns': len(seconds), 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+            'max_ms': max(seconds) * 1000}
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga com N sessões simultâneas mudando os filtros do dashboard.")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--reruns", type=int, default=20, help="interações por sessão")
+    parser.add_argument("--scripts", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="tempo máximo de um rerun (s)")
+    parser.add_argument("--output", type=Path, help="grava o relatório em JSON")
+    args = parser.parse_args()
+
+    # Os scripts abrem arquivos (logo.png, dataset/) relativos à raiz do projeto
+    os.chdir(ROOT)
+    isolate_sessions()
+
+    # Aquecimento: importações e caches (dataset, cubo, índices) são carregados
+    # antes das sessões, como acontece com o servidor já no ar.
+    warmup = {}
+    for script in args.scripts:
+        start = time.perf_counter()
+        AppTest.from_file(str(ROOT / script), default_timeout=args.timeout).run()
+        warmup[script] = time.perf_counter() - start
+
+    process = psutil.Process()
+    rss_start = process.memory_info().rss
+    rss, stop = [rss_start], threading.Event()
+    sampler = threading.Thread(target=sample_rss, args=(stop, 0.05, rss), daemon=True)
+    sampler.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as executor:
+        futures = [executor.submit(run_session, args.scripts[i % len(args.scripts)], args.reruns,
+                                   args.seed + i, args.timeout)
+                   for i in range(args.sessions)]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    sampler.join()
+    rss.append(process.memory_info().rss)
+
+    samples = [sample for session, _ in results for sample in session]
+    reruns = [s['seconds'] for s in samples if not s['first']]
+    report = {
+        'sessions': args.sessions,
+        'reruns_per_session': args.reruns,
+        'elapsed_s': elapsed,
+        'reruns_per_s': len(reruns) / elapsed,
+        'warmup_s': warmup,
+        'errors': [error for _, errors in results for error in errors],
+        'first_run': latency_summary([s['seconds'] for s in samples if s['first']]),
+        'rerun': latency_summary(reruns),
+        'by_script': {script: latency_summary([s['seconds'] for s in samples
+                                               if s['script'] == script and not s['first']])
+                      for script in args.scripts},
+        'rss_mb': {'start': rss_start / 2**20, 'peak': max(rss) / 2**20, 'end': rss[-1] / 2**20},
+    }
+
+    print(f"{args.sessions} sessões x {args.reruns} reruns em {elapsed:.1f}s "
+          f"({report['reruns_per_s']:.1f} reruns/s, {len(report['errors'])} erros)")
+    for error in sorted(set(report['errors'])):
+        print(f"  erro: {error}")
+    for name, summary in [('primeira execução', report['first_run']), ('reruns', report['rerun']),
+                          *report['by_script'].items()]:
+        print(f"  {name:<28} p50 {summary['p50_ms']:>8.1f} ms  p95 {summary['p95_ms']:>8.1f} ms  "
+              f"p99 {summary['p99_ms']:>8.1f} ms  (n={summary['reruns']})")
+    print("  RSS  início {start:.0f} MiB  pico {peak:.0f} MiB  fim {end:.0f} MiB".format(**report['rss_mb']))
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.common import best_of, peak_memory, synthetic_csv
+from utils import charts
+from utils.cube import build_cube, select_countries
+from utils.data import (DATASET_PATH, DEFAULT_COUNTRIES, adjust_columns_order, clean_code, compact_dtypes,
+                        deduplicate, rename_columns)
+from utils.index import build_indexes
+from utils.maps import build_map
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def stages(csv_path):
+    # Sequência (nome, função) de etapas; cada função recebe o estado acumulado
+    # e devolve o valor produzido pela etapa.
+    return [
+        ("read_csv", lambda s: pd.read_csv(csv_path)),
+        ("rename_columns", lambda s: rename_columns(s["read_csv"])),
+        ("clean_code", lambda s: clean_code(s["rename_columns"])),
+        ("deduplicate", lambda s: deduplicate(s["clean_code"])),
+        ("adjust_columns_order", lambda s: adjust_columns_order(s["deduplicate"])),
+        ("compact_dtypes", lambda s: compact_dtypes(s["adjust_columns_order"])),
+        ("build_cube", lambda s: build_cube(s["compact_dtypes"])),
+        ("build_indexes", lambda s: build_indexes(s["compact_dtypes"])),
+        ("select_countries", lambda s: select_countries(s["build_cube"], DEFAULT_COUNTRIES)),
+        ("figura1", lambda s: charts.figura1(s["select_countries"])),
+        ("figura2", lambda s: charts.figura2(s["select_countries"])),
+        ("figura3", lambda s: charts.figura3(s["select_countries"])),
+        ("figura4", lambda s: charts.figura4(s["select_countries"])),
+        ("top_cities_restaurants", lambda s: charts.top_cities_restaurants(s["select_countries"])),
+        ("top_7_cities_4", lambda s: charts.top_7_cities_4(s["select_countries"])),
+        ("top_worst_cities_4", lambda s: charts.top_worst_cities_4(s["select_countries"])),
+        ("top_cuisine_cities", lambda s: charts.top_cuisine_cities(s["select_countries"])),
+        ("filter_countries", lambda s: s["compact_dtypes"].take(
+            s["build_indexes"]["country"].rows(s["build_indexes"]["country"].select(DEFAULT_COUNTRIES)))),
+        ("cuisine_ratings", lambda s: charts.cuisine_ratings(s["filter_countries"])),
+        ("top_cuisine", lambda s: (charts.top_cuisine(s["cuisine_ratings"], False, 10),
+                                   charts.top_cuisine(s["cuisine_ratings"], True, 10))),
+        ("create_map", lambda s: build_map(s["filter_countries"]).get_root().render()),
+    ]
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def run_scale(csv_path, repeat, skip):
+    state, results = {}, []
+    for name, stage in stages(csv_path):
+        if name in skip:
+            continue
+        seconds, state[name] = best_of(stage, state, repeat=repeat)
+        peak = peak_memory(stage, state)
+        results.append({"stage": name, "seconds": seconds, "peak_bytes": peak})
+        print(f"  {name:<24} {seconds * 1000:>10.1f} ms {peak / 2**20:>10.1f} MiB")
+    return len(state["read_csv"]), results
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def compare(report, baseline):
+    # Razão tempo atual / tempo de referência por escala e etapa.
+    previous = {(run["scale"], stage["stage"]): stage["seconds"]
+                for run in baseline["runs"] for stage in run["stages"]}
+    print(f"comparação com {baseline.get('commit')} ({baseline.get('timestamp')})")
+    for run in report["runs"]:
+        for stage in run["stages"]:
+            before = previous.get((run["scale"], stage["stage"]))
+            if before:
+                print(f"  x{run['scale']:<6} {stage['stage']:<24} {stage['seconds'] / before:>6.2f}x")
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Tempo e pico de memória de cada etapa do pipeline e dos gráficos.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip", nargs="*", default=[], help="etapas a pular (ex.: create_map)")
+    parser.add_argument("--output", type=Path, help="arquivo JSON de saída (padrão: benchmarks/results/)")
+    parser.add_argument("--baseline", type=Path, help="JSON de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    commit = git_commit()
+    report = {
+        "timestamp": now.isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "runs": [],
+    }
+
+    base = pd.read_csv(DATASET_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        for factor in args.scales:
+            csv_path = DATASET_PATH
+            if factor != 1:
+                csv_path = Path(tmp) / f"zomato_x{factor}.csv"
+                synthetic_csv(base, factor).to_csv(csv_path, index=False)
+            print(f"x{factor}")
+            rows, results = run_scale(csv_path, args.repeat, set(args.skip))
+            report["runs"].append({"scale": factor, "rows": rows, "stages": results})
+            if factor != 1:
+                csv_path.unlink()
+
+    output = args.output or RESULTS_DIR / f"{now:%Y%m%dT%H%M%S}_{commit or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"resultados gravados em {output}")
+
+    if args.baseline:
+        compare(report, json.loads(args.baseline.read_text()))
+
+
+if __name__ == "__main__":
+    main()
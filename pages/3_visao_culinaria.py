@@ -2,148 +2,60 @@
 #                                       BIBLIOTECA
 # ===========================================================================================
 
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import folium
 import streamlit as st
-import datetime
-import inflection
-
-from haversine import haversine
-from PIL import Image
-from streamlit_folium import folium_static
+import functools
+
+from utils.arrow_query import select_rows
+from utils.data import DEFAULT_COUNTRIES, QUERY_BACKEND
+from utils.charts import cuisine_ratings, top_cuisine
+from utils.figures import get_figure_cache
+from utils.stages import DependencyGraph, isolated
+from utils.store import current_dataset
+from utils.timing import finish_timer, span, start_timer
+from utils.topk import group_top_k, top_k
+from utils.views import TOP_COLUMNS, TOP_LIST_SIZE
 
 st.set_page_config(page_title='Culinária', page_icon='🍽️', layout='wide')
+start_timer('Culinária')
 # ===========================================================================================
 #                                       VARIÁVEIS
 # ===========================================================================================
 
-COUNTRIES = {
-   1: "India",
-   14: "Australia",
-   30: "Brazil",
-   37: "Canada",
-   94: "Indonesia",
-   148: "New Zeland",
-   162: "Philippines",
-   166: "Qatar",
-   184: "Singapure",
-   189: "South Africa",
-   191: "Sri Lanka",
-   208: "Turkey",
-   214: "United Arab Emirates",
-   215: "England",
-   216: "United States of America",
-}
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-
-COLORS = {
-   "3F7E00": "darkgreen",
-   "5BA829": "green",
-   "9ACD32": "lightgreen",
-   "CDD614": "orange",
-   "FFBA00": "red",
-   "CBCBC8": "darkred",
-   "FF7800": "darkred",
-}
+# De quais entradas cada seção depende: o slider de top N refaz só as listas de
+# top N; a nota máxima por culinária e o melhor de cada grupo saem do cache.
+SECOES = DependencyGraph('culinaria', {
+    'top_restaurantes': ['version', 'countries', 'cuisines', 'top_n'],
+    'notas_culinaria': ['version', 'countries', 'cuisines'],
+    'top_cuisine_melhores': ['version', 'countries', 'cuisines', 'top_n'],
+    'top_cuisine_piores': ['version', 'countries', 'cuisines', 'top_n'],
+    'melhor_por_grupo': ['version', 'countries', 'cuisines', 'group'],
+})
 
 # ===========================================================================================
 #                                       FUNÇÕES
 # ===========================================================================================
 
-def rename_columns(df):
-    df = df.copy()
-    title = lambda x: inflection.titleize(x) 
-    snakecase = lambda x: inflection.underscore(x) 
-    spaces = lambda x: x.replace(" ", "")
-    cols_old = list(df.columns)
-    cols_old = list(map(title, cols_old))
-    cols_old = list(map(spaces, cols_old)) 
-    cols_new = list(map(snakecase, cols_old))
-    df.columns = cols_new
-    return df
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-def country_name(country_id):
-    return COUNTRIES[country_id]
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-def create_price_tye(price_range):
-    if price_range == 1:
-        return "cheap"
-    elif price_range == 2: 
-        return "normal"
-    elif price_range == 3: 
-        return "expensive"
-    else:
-        return "gourmet"
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-def color_name(color_code): 
-    return COLORS[color_code]
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-def adjust_columns_order(dataframe):
-    df = dataframe.copy()
-
-    new_cols_order = [
-        "restaurant_id",
-        "restaurant_name",
-        "country",
-        "city",
-        "address",
-        "locality",
-        "locality_verbose",
-        "longitude",
-        "latitude",
-        "cuisines",
-        "price_type",
-        "average_cost_for_two",
-        "currency",
-        "has_table_booking",
-        "has_online_delivery",
-        "is_delivering_now",
-        "aggregate_rating",
-        "rating_color",
-        "color_name",
-        "rating_text",
-        "votes",
-    ]
-
-    return df.loc[:, new_cols_order]
-
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-def clean_code(df1):
-    df1 = df1.dropna()
-    df1["country"] = df1.loc[:, "country_code"].apply(lambda x: country_name(x))
-    df1["price_type"] = df1.loc[:, "price_range"].apply(lambda x: create_price_tye(x))
-    df1["color_name"] = df1.loc[:, "rating_color"].apply(lambda x: color_name(x))
-    df1["cuisines"] = df1.loc[:, "cuisines"].apply(lambda x: x.split(",")[0])    
-    return df1
-# ------------------------------------------------------------------------------------------------------------------------------------------------
-def top_cuisine(df1, top_b):
-    df_aux = df1.loc[:,['cuisines', 'aggregate_rating']].groupby('cuisines').max().sort_values('aggregate_rating', ascending=top_b).reset_index()
-    fig = px.bar(df_aux.head(top_n), x='cuisines', y='aggregate_rating', labels={"cuisines": "Tipo de Culinária", "aggregate_rating": "Avaliação Média",})
-    return fig
-
+@isolated
+def best_by_group(linhas, entradas):
+    # Com fragmentos, trocar o agrupamento reroda só esta seção
+    grupo = st.radio('Melhor restaurante por', ['Culinária', 'País'], horizontal=True, key='grupo')
+    coluna = 'cuisines' if grupo == 'Culinária' else 'country'
+    st.markdown(f'## Melhor restaurante de cada {grupo.lower()}')
+    with span('group_top_k'):
+        df_aux = SECOES.stage('melhor_por_grupo',
+                              lambda: group_top_k(linhas()[TOP_COLUMNS], coluna, 1, 'aggregate_rating', 'restaurant_id'),
+                              **entradas, group=grupo)
+    with span('dataframe'):
+        st.dataframe(df_aux, hide_index=True)
 # ===========================================================================================
 #                               INICIO DA ESTRUTURA LÓGICA
 # ===========================================================================================
 
-# Importando o Data set
-df = pd.read_csv('dataset/zomato.csv')
-
-# Renomeando as Colunas
-df = rename_columns(df)
-
-# Limpeza dos dados
-
-df = clean_code(df)
-
-# Organizando as Colunas
-
-df1 = adjust_columns_order(df)
-
-# cópia do código
-
-df1 = df.copy()
+# Versão atual dos índices dos filtros e das visões pré-calculadas por país
+with span('dataset'):
+    dataset = current_dataset()
+    indexes = dataset.indexes
+    views = dataset.views
 
 # =====================================================================================
 #                           BARRA LATERAL
@@ -156,27 +68,38 @@ st.sidebar.markdown('## Selecione um País')
 
 data_select = st.sidebar.multiselect(
     'Quais os países ?',
-    df1.loc[:, 'country'].unique().tolist(),
-    default=["Brazil", "England", "Qatar", "South Africa", "Canada", "Australia"])
+    indexes['country'].values,
+    default=DEFAULT_COUNTRIES)
 
-top_n = st.sidebar.slider("Selecione a quantidade de Restaurantes que deseja visualizar", 1, 20, 10)
+top_n = st.sidebar.slider("Selecione a quantidade de Restaurantes que deseja visualizar", 1, TOP_LIST_SIZE, 10)
 
 cuisine_select = st.sidebar.multiselect(
     'Quais culinárias ?',
-    df1.loc[:, "cuisines"].unique().tolist(),
+    dataset.cuisines,
     default=["Home-made", "BBQ", "Japanese", "Brazilian", "Arabian", "American", "Italian",])
 
 
 st.sidebar.markdown("""---""")
 st.sidebar.markdown('#### Feito por Henrique Kubo')
 
-# Filtro de País
-linhas_selecionadas = df1['country'].isin(data_select)
-df1 = df1.loc[linhas_selecionadas, :]
-
-# Filtro de Culinária
-linhas_selecionadas_culinaria = df1['cuisines'].isin(cuisine_select)
-df1 = df1.loc[linhas_selecionadas_culinaria, :]
+entradas = dict(version=dataset.version, countries=data_select, cuisines=cuisine_select, top_n=top_n)
+
+# Filtro de País e de Culinária: junção das listas pré-calculadas dos países
+# selecionados (os melhores de cada culinária bastam para qualquer top N do slider).
+# Só roda se alguma seção que depende dele não estiver no cache.
+@functools.cache
+def linhas_top():
+    with span('filter'):
+        return views.select('top', data_select, cuisines=cuisine_select)
+
+def notas_culinaria():
+    # Nota máxima por culinária a partir das máximas de cada país; no backend
+    # arrow ela sai da tabela Arrow filtrada
+    with span('filter'):
+        linhas_culinaria = (select_rows(dataset.table.select(['country', 'cuisines', 'aggregate_rating']),
+                                        country=data_select, cuisines=cuisine_select)
+                            if QUERY_BACKEND == 'arrow' else views.select('ratings', data_select, cuisines=cuisine_select))
+    return cuisine_ratings(linhas_culinaria)
 
 # =====================================================================================
 #                           LAYOUT STREAMNLIT
@@ -184,9 +107,12 @@ df1 = df1.loc[linhas_selecionadas_culinaria, :]
 
 with st.container():
     st.markdown(f'## Top {top_n} Restaurantes melhores avaliados')
-    df_aux = (df1.loc[:,['restaurant_id', 'restaurant_name', 'country', 'city', 'cuisines', 'average_cost_for_two', 'aggregate_rating', 'votes']]
-        .sort_values(['aggregate_rating', 'restaurant_id'], ascending=[False, True])).head(top_n)
-    st.dataframe(df_aux)
+    with span('top_k'):
+        df_aux = SECOES.stage('top_restaurantes',
+                              lambda: top_k(linhas_top()[TOP_COLUMNS], top_n, 'aggregate_rating', 'restaurant_id'),
+                              **entradas)
+    with span('dataframe'):
+        st.dataframe(df_aux)
 
 st.sidebar.markdown("""---""")
 
@@ -194,10 +120,26 @@ with st.container():
     col1, col2 = st.columns(2)
     with col1:
         st.markdown(f'##### Top {top_n} Melhores Tipos de Culinária')
-        fig = top_cuisine(df1, False)
-        st.plotly_chart(fig, use_container_width=True)
+        with span('top_cuisine'):
+            fig = SECOES.stage('top_cuisine_melhores',
+                               lambda: top_cuisine(SECOES.stage('notas_culinaria', notas_culinaria, **entradas), False, top_n),
+                               **entradas)
+            with span('plotly_chart'):
+                st.plotly_chart(fig, use_container_width=True)
 
     with col2:
         st.markdown(f'##### Top {top_n} Piores Tipos de Culinária')
-        fig = top_cuisine(df1, True)
-        st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+        with span('top_cuisine'):
+            fig = SECOES.stage('top_cuisine_piores',
+                               lambda: top_cuisine(SECOES.stage('notas_culinaria', notas_culinaria, **entradas), True, top_n),
+                               **entradas)
+            with span('plotly_chart'):
+                st.plotly_chart(fig, use_container_width=True)
+
+st.markdown("""---""")
+
+with st.container():
+    best_by_group(linhas_top, entradas)
+
+finish_timer({'countries': data_select, 'cuisines': cuisine_select, 'top_n': top_n, 'group': st.session_state.get('grupo')},
+             figure_cache=get_figure_cache().stats())
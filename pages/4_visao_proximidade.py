@@ -0,0 +1,96 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.store import current_dataset
+from utils.timing import finish_timer, span, start_timer
+
+st.set_page_config(page_title='Perto de Mim', page_icon='📍', layout='wide')
+start_timer('Perto de Mim')
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def city_center(df1, country, city):
+    # Cidades com o mesmo nome em países diferentes são lugares diferentes
+    linhas = df1.loc[(df1['country'] == country) & (df1['city'] == city), ['latitude', 'longitude']]
+    return float(linhas['latitude'].mean()), float(linhas['longitude'].mean())
+
+# ===========================================================================================
+#                               INICIO DA ESTRUTURA LÓGICA
+# ===========================================================================================
+
+# Versão atual dos dados tratados e do índice espacial
+with span('dataset'):
+    dataset = current_dataset()
+    df1 = dataset.frame()
+    spatial_index = dataset.spatial_index
+
+# =====================================================================================
+#                           BARRA LATERAL
+# =====================================================================================
+st.header('Perto de Mim 📍')
+st.markdown('---')
+
+st.sidebar.markdown('## Escolha um ponto')
+
+cidades = sorted(df1[['city', 'country']].drop_duplicates().itertuples(index=False, name=None))
+# Rio de Janeiro quando existe; outro CSV (python -m utils.etl --csv) pode não ter a cidade
+inicio = next((i for i, (city, country) in enumerate(cidades) if (city, country) == ('Rio de Janeiro', 'Brazil')), 0)
+cidade, pais = st.sidebar.selectbox('Começar pelo centro de qual cidade ?', cidades, index=inicio,
+                                    format_func=lambda item: f'{item[0]} ({item[1]})')
+lat_centro, lon_centro = city_center(df1, pais, cidade)
+
+latitude = st.sidebar.number_input('Latitude', -90.0, 90.0, lat_centro, format='%.5f', key=f'lat_{pais}_{cidade}')
+longitude = st.sidebar.number_input('Longitude', -180.0, 180.0, lon_centro, format='%.5f', key=f'lon_{pais}_{cidade}')
+
+st.sidebar.markdown("""---""")
+
+busca = st.sidebar.radio('Buscar', ['Dentro de um raio', 'Os mais próximos'])
+if busca == 'Dentro de um raio':
+    raio = st.sidebar.slider('Raio (km)', 0.5, 50.0, 5.0, step=0.5)
+else:
+    k = st.sidebar.slider('Quantidade de restaurantes', 1, 100, 10)
+
+st.sidebar.markdown("""---""")
+st.sidebar.markdown('#### Feito por Henrique Kubo')
+
+# Consulta no índice espacial
+with span('spatial_query'):
+    if busca == 'Dentro de um raio':
+        linhas, distancias = spatial_index.within(latitude, longitude, raio)
+        titulo = f'{len(linhas)} restaurantes a até {raio:g} km'
+    else:
+        linhas, distancias = spatial_index.nearest(latitude, longitude, k)
+        titulo = f'Os {len(linhas)} restaurantes mais próximos'
+
+# =====================================================================================
+#                           LAYOUT STREAMNLIT
+# =====================================================================================
+
+with st.container():
+    st.markdown(f'## {titulo}')
+    df_aux = (df1.take(linhas)
+                 .loc[:, ['restaurant_id', 'restaurant_name', 'country', 'city', 'cuisines',
+                          'average_cost_for_two', 'aggregate_rating', 'votes', 'latitude', 'longitude']]
+                 .assign(distance_km=np.round(distancias, 2)))
+    with span('dataframe'):
+        st.dataframe(df_aux, hide_index=True)
+
+st.markdown("""---""")
+
+with st.container():
+    pontos = pd.concat([
+        pd.DataFrame({'latitude': [latitude], 'longitude': [longitude], 'color': ['#ff0000']}),
+        df_aux[['latitude', 'longitude']].assign(color='#3186cc'),
+    ])
+    with span('map'):
+        st.map(pontos, latitude='latitude', longitude='longitude', color='color')
+
+finish_timer({'country': pais, 'city': cidade, 'latitude': latitude, 'longitude': longitude, 'search': busca,
+              'radius_km': raio if busca == 'Dentro de um raio' else None,
+              'k': k if busca == 'Os mais próximos' else None})
@@ -0,0 +1,29 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data import DATASET_PATH, load_dataset
+
+# ===========================================================================================
+#                                       FIXTURES
+# ===========================================================================================
+
+@pytest.fixture(scope="session")
+def dataset():
+    # O zomato.csv tratado, como o servidor o carrega
+    return load_dataset(DATASET_PATH)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+@pytest.fixture
+def ratings():
+    # Notas com muitos empates e ids embaralhados, para exercitar o desempate
+    rng = np.random.default_rng(0)
+    n = 2_000
+    return pd.DataFrame({
+        "restaurant_id": rng.permutation(n).astype("int32"),
+        "group": pd.Categorical(rng.choice(list("abcdefg"), n), categories=list("abcdefg")),
+        "aggregate_rating": rng.choice(np.arange(0, 50) / 10, n),
+    })
@@ -0,0 +1,41 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import pandas as pd
+
+from utils.cube import CUBE_DIMENSIONS, build_cube, merge_cubes
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def plain_cube(df):
+    # O cubo calculado direto com groupby sobre as colunas em texto
+    df = df.astype({dim: str for dim in CUBE_DIMENSIONS})
+    grouped = df.groupby(CUBE_DIMENSIONS)
+    return pd.DataFrame({
+        "rows": grouped.size(),
+        "votes": grouped["votes"].sum().astype("int64"),
+        "cost_for_two": grouped["average_cost_for_two"].sum().astype("int64"),
+        "rating_above_4": grouped["aggregate_rating"].apply(lambda s: int((s >= 4).sum())),
+        "rating_below_2_5": grouped["aggregate_rating"].apply(lambda s: int((s <= 2.5).sum())),
+    })
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def as_plain(cube):
+    cube = cube.astype("int64")
+    cube.index = pd.MultiIndex.from_frame(cube.index.to_frame(index=False).astype(str))
+    return cube
+
+# ===========================================================================================
+#                                       TESTES
+# ===========================================================================================
+
+def test_build_cube_igual_ao_groupby(dataset):
+    pd.testing.assert_frame_equal(as_plain(build_cube(dataset)), plain_cube(dataset), check_names=False)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def test_merge_cubes_de_blocos_igual_ao_cubo_inteiro(dataset):
+    # Blocos disjuntos em sequência, como no --stream
+    parts = [build_cube(dataset.iloc[start:start + 1_000]) for start in range(0, len(dataset), 1_000)]
+    pd.testing.assert_frame_equal(merge_cubes(*parts), build_cube(dataset), check_categorical=False)
+    pd.testing.assert_frame_equal(as_plain(merge_cubes(*parts)), plain_cube(dataset), check_names=False)
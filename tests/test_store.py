@@ -0,0 +1,75 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import pandas as pd
+import pytest
+
+from utils.cube import build_cube
+from utils.data import DATASET_PATH, load_dataset
+from utils.store import Dataset, apply_deltas
+from utils.views import precompute_views
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def by_id(df):
+    # Uma linha por restaurant_id, em ordem, com as categorias como texto
+    df = df.sort_values("restaurant_id", ignore_index=True)
+    return df.astype({col: str for col in df.select_dtypes("category").columns})
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def by_key(cube):
+    cube = cube.copy()
+    cube.index = pd.MultiIndex.from_frame(cube.index.to_frame(index=False).astype(str))
+    return cube.sort_index()
+
+# ===========================================================================================
+#                                       FIXTURES
+# ===========================================================================================
+
+@pytest.fixture(scope="module")
+def csv_parts(tmp_path_factory):
+    # O CSV original dividido em uma base e dois deltas que se sobrepõem à base e
+    # entre si, com as notas alteradas para distinguir a linha que deve vencer
+    raw = pd.read_csv(DATASET_PATH)
+    base, first, second = raw.iloc[:5_000], raw.iloc[4_500:6_500].copy(), raw.iloc[6_000:].copy()
+    first["Aggregate rating"] = (first["Aggregate rating"] + 0.1).clip(upper=4.9).round(1)
+    second["Votes"] = second["Votes"] + 1
+    second = pd.concat([second, first.iloc[:300].assign(Votes=7)])
+
+    folder = tmp_path_factory.mktemp("deltas")
+    paths = []
+    for name, part in [("base", base), ("delta_1", first), ("delta_2", second)]:
+        paths.append(folder / f"{name}.csv")
+        part.to_csv(paths[-1], index=False)
+    return paths
+
+# ===========================================================================================
+#                                       TESTES
+# ===========================================================================================
+
+@pytest.mark.parametrize("with_views", [False, True])
+def test_apply_deltas_igual_ao_concat_drop_duplicates(csv_parts, with_views):
+    base_path, *delta_paths = csv_parts
+    base = load_dataset(base_path)
+    deltas = [load_dataset(p) for p in delta_paths]
+    derived = {"views": precompute_views(base, workers=1)} if with_views else None
+
+    updated = apply_deltas(Dataset(base, "v0", derived), delta_paths)
+
+    # Baseline: a linha mais recente de cada restaurant_id vence
+    expected = pd.concat([base, *deltas]).drop_duplicates("restaurant_id", keep="last")
+    pd.testing.assert_frame_equal(by_id(updated.df), by_id(expected))
+    assert updated.df.index.is_unique
+    assert updated.df.attrs["duplicates"] == sum(f.attrs["duplicates"] for f in [base, *deltas]) + \
+        int(pd.concat(deltas)["restaurant_id"].duplicated().sum())
+
+    pd.testing.assert_frame_equal(by_key(updated.cube), by_key(build_cube(expected)))
+    if with_views:
+        views = updated.views.views
+        fresh = precompute_views(updated.df, workers=1).views
+        pd.testing.assert_frame_equal(views["ratings"], fresh["ratings"], check_categorical=False)
+        pd.testing.assert_frame_equal(views["top"].sort_values(["country", "cuisines", "aggregate_rating", "restaurant_id"]),
+                                      fresh["top"].sort_values(["country", "cuisines", "aggregate_rating", "restaurant_id"]),
+                                      check_categorical=False)
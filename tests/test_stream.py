@@ -0,0 +1,36 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import numpy as np
+import pandas as pd
+
+from utils.cube import build_cube, read_cube
+from utils.data import read_snapshot
+from utils.stream import SeenIds, stream_ingest
+
+# ===========================================================================================
+#                                       TESTES
+# ===========================================================================================
+
+def test_seen_ids_igual_ao_duplicated():
+    # Ids repetidos dentro de um bloco e entre blocos, inclusive o zero
+    ids = np.random.default_rng(0).integers(0, 5_000, 20_000)
+    seen = SeenIds()
+    mask = np.concatenate([seen.first_seen(chunk) for chunk in np.array_split(ids, 9)])
+    np.testing.assert_array_equal(mask, ~pd.Series(ids).duplicated(keep="first").to_numpy())
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def test_stream_ingest_igual_ao_load_dataset(dataset, tmp_path):
+    # Blocos menores que o CSV: os duplicados (todos repetidos em outro bloco)
+    # saem pelo SeenIds, e o resultado deve ser o do load_dataset
+    out, cube_path = tmp_path / "snapshot.arrow", tmp_path / "cube.parquet"
+    stats = stream_ingest(chunk_rows=1_000, out=out, cube_path=cube_path)
+
+    snapshot = read_snapshot(out)
+    assert stats["rows"] == len(dataset)
+    assert stats["duplicates"] == dataset.attrs["duplicates"]
+    pd.testing.assert_frame_equal(snapshot, dataset, check_categorical=False)
+
+    cube = read_cube(cube_path)
+    assert cube.attrs["duplicates"] == dataset.attrs["duplicates"]
+    pd.testing.assert_frame_equal(cube, build_cube(dataset), check_categorical=False)
@@ -0,0 +1,30 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import pandas as pd
+import pytest
+
+from utils.topk import group_top_k, top_k
+
+# ===========================================================================================
+#                                       TESTES
+# ===========================================================================================
+
+@pytest.mark.parametrize("ascending", [False, True])
+@pytest.mark.parametrize("k", [0, 1, 10, 500, 5_000])
+def test_top_k_igual_ao_sort_values(ratings, k, ascending):
+    expected = ratings.sort_values(["aggregate_rating", "restaurant_id"], ascending=[ascending, True]).head(k)
+    pd.testing.assert_frame_equal(top_k(ratings, k, "aggregate_rating", "restaurant_id", ascending), expected)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+@pytest.mark.parametrize("k", [1, 3, 1_000])
+def test_group_top_k_igual_ao_groupby_head(ratings, k):
+    expected = (ratings.sort_values(["group", "aggregate_rating", "restaurant_id"], ascending=[True, False, True])
+                       .groupby("group", observed=True).head(k))
+    pd.testing.assert_frame_equal(group_top_k(ratings, "group", k, "aggregate_rating", "restaurant_id"), expected)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def test_top_k_desempata_por_categoria(dataset):
+    # Desempate por uma coluna categórica usa a ordem alfabética das categorias
+    ratings = dataset.groupby("cuisines", observed=True)["aggregate_rating"].max().reset_index()
+    expected = ratings.sort_values(["aggregate_rating", "cuisines"], ascending=[False, True]).head(10)
+    pd.testing.assert_frame_equal(top_k(ratings, 10, "aggregate_rating", "cuisines"), expected)
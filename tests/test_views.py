@@ -0,0 +1,42 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import pandas as pd
+
+from utils.views import TOP_COLUMNS, TOP_LIST_SIZE, merge_views, precompute_views
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def plain_top(df):
+    # Os TOP_LIST_SIZE melhores de cada (país, culinária), com sort_values e groupby
+    return (df[TOP_COLUMNS].sort_values(["country", "cuisines", "aggregate_rating", "restaurant_id"],
+                                        ascending=[True, True, False, True])
+                           .groupby(["country", "cuisines"], observed=True).head(TOP_LIST_SIZE))
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def plain_ratings(df):
+    return df.groupby(["country", "cuisines"], observed=True)["aggregate_rating"].max().reset_index()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def by_key(top):
+    return top.sort_values(["country", "cuisines", "aggregate_rating", "restaurant_id"],
+                           ascending=[True, True, False, True])
+
+# ===========================================================================================
+#                                       TESTES
+# ===========================================================================================
+
+def test_precompute_views_igual_ao_groupby(dataset):
+    views = precompute_views(dataset, workers=1).views
+    pd.testing.assert_frame_equal(by_key(views["top"]), plain_top(dataset))
+    pd.testing.assert_frame_equal(views["ratings"], plain_ratings(dataset))
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def test_merge_views_de_blocos_igual_ao_dataset_inteiro(dataset):
+    # Blocos pequenos: as listas de cada bloco são cortadas e a junção precisa refazer o top
+    merged = None
+    for start in range(0, len(dataset), 700):
+        part = precompute_views(dataset.iloc[start:start + 700], workers=1).views
+        merged = part if merged is None else merge_views(merged, part)
+    pd.testing.assert_frame_equal(by_key(merged["top"]), plain_top(dataset))
+    pd.testing.assert_frame_equal(merged["ratings"], plain_ratings(dataset))
@@ -0,0 +1,281 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+import tornado.ioloop
+import tornado.web
+from cachetools import LRUCache
+
+from utils.charts import cuisine_ratings, queries
+from utils.store import DatasetStore
+from utils.topk import top_k
+from utils.views import TOP_COLUMNS, TOP_LIST_SIZE, VIEW_COLUMNS
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+# API JSON local com os mesmos números das páginas, para outros serviços não
+# precisarem raspar o dashboard: `python -m utils.api --port 8502`.
+API_PORT = int(os.environ.get("FOME_ZERO_API_PORT", "8502"))
+
+# Respostas prontas por (versão dos dados, consulta); as menos usadas saem primeiro
+RESPONSE_CACHE_SIZE = int(os.environ.get("FOME_ZERO_API_CACHE_SIZE", "512"))
+
+# Consultas por requisição em /api/batch
+MAX_BATCH = 50
+
+# Restaurantes por consulta em /api/restaurants
+MAX_IDS = 1000
+
+logger = logging.getLogger(__name__)
+
+# ===========================================================================================
+#                                       CLASSES
+# ===========================================================================================
+
+class ApiHandler(tornado.web.RequestHandler):
+    # Base dos handlers: cada requisição fixa a versão publicada no início, como
+    # um rerun das páginas, e a ETag é essa versão mais a consulta normalizada.
+    def initialize(self, store, cache):
+        self.store = store
+        self.cache = cache
+
+    def prepare(self):
+        self.dataset = self.store.current
+
+    def write_error(self, status_code, **kwargs):
+        self.finish({"error": self._reason})
+
+    def respond(self, requests, batch=False):
+        etag = query_etag(self.dataset.version, requests, batch)
+        self.set_header("ETag", etag)
+        # Os clientes podem guardar a resposta, mas revalidam a cada uso (304 se nada mudou)
+        self.set_header("Cache-Control", "no-cache")
+        if self.request.method in ("GET", "HEAD") and self.check_etag_header():
+            self.set_status(304)
+            return
+
+        # O tornado atende tudo na thread do IOLoop, então o cache dispensa lock
+        body = self.cache.get(etag)
+        if body is None:
+            results = [run_query(self.dataset, name, params) for name, params in requests]
+            payload = {"version": self.dataset.version}
+            payload.update({"results": results} if batch else {"result": results[0]})
+            body = json.dumps(payload, ensure_ascii=False, default=to_native).encode()
+            self.cache[etag] = body
+        self.set_header("Content-Type", "application/json; charset=UTF-8")
+        self.write(body)
+
+    def compute_etag(self):
+        # A ETag já é definida em respond(), antes de montar o corpo
+        return None
+
+
+class QueryHandler(ApiHandler):
+    def get(self, name):
+        params = {key: self.get_arguments(key) for key in self.request.query_arguments}
+        self.respond([(name, normalize_params(name, params))])
+
+
+class BatchHandler(ApiHandler):
+    # Várias consultas em uma requisição: {"queries": [{"query": "countries", "countries": [...]}, ...]}
+    def post(self):
+        try:
+            items = json.loads(self.request.body or b"{}")["queries"]
+        except (ValueError, KeyError, TypeError):
+            raise tornado.web.HTTPError(400, reason='Corpo esperado: {"queries": [...]}')
+        if not isinstance(items, list) or not items or len(items) > MAX_BATCH:
+            raise tornado.web.HTTPError(400, reason=f"Envie de 1 a {MAX_BATCH} consultas")
+
+        requests = []
+        for item in items:
+            if not isinstance(item, dict) or "query" not in item:
+                raise tornado.web.HTTPError(400, reason='Cada consulta precisa do campo "query"')
+            params = {key: value if isinstance(value, list) else [value]
+                      for key, value in item.items() if key != "query"}
+            requests.append((item["query"], normalize_params(item["query"], params)))
+        self.respond(requests, batch=True)
+
+
+class VersionHandler(ApiHandler):
+    def get(self):
+        self.set_header("Cache-Control", "no-cache")
+        self.write({"version": self.dataset.version, "rows": len(self.dataset.df)})
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def to_native(value):
+    # Escalares do numpy/pandas que o json não conhece
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def records(df):
+    # Colunas float32 (latitude e longitude compactas) saem com a representação
+    # mais curta do float32, como no CSV de origem, e não com o ruído da conversão
+    # para float64 (14.447615, não 14.447614669799805)
+    floats = df.select_dtypes("float32").columns
+    if len(floats):
+        df = df.astype({col: str for col in floats}).astype({col: "float64" for col in floats})
+    return df.to_dict("records")
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def int_param(params, name, default, low, high):
+    values = params.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[-1])
+    except (TypeError, ValueError):
+        raise tornado.web.HTTPError(400, reason=f"{name} deve ser um inteiro")
+    if not low <= value <= high:
+        raise tornado.web.HTTPError(400, reason=f"{name} deve estar entre {low} e {high}")
+    return value
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def normalize_params(name, params):
+    # Forma canônica dos parâmetros (listas ordenadas e sem repetição), para que a
+    # mesma consulta escrita de outro jeito tenha a mesma ETag e a mesma entrada no
+    # cache. Parâmetros que a consulta não usa são ignorados.
+    if name not in QUERIES:
+        raise tornado.web.HTTPError(404, reason=f"Consulta desconhecida: {name}")
+    accepted = QUERY_PARAMS[name]
+    normalized = {}
+    for key in ("countries", "cuisines"):
+        if key in accepted and params.get(key):
+            normalized[key] = sorted({str(v) for v in params[key]})
+    if "ids" in accepted:
+        ids = params.get("ids") or []
+        try:
+            normalized["ids"] = sorted({int(v) for value in ids for v in str(value).split(",") if v})
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="ids deve ser uma lista de inteiros")
+        if not 1 <= len(normalized["ids"]) <= MAX_IDS:
+            raise tornado.web.HTTPError(400, reason=f"Envie de 1 a {MAX_IDS} ids")
+    if "limit" in accepted:
+        normalized["limit"] = int_param(params, "limit", 10, 1, 1000)
+    if "n" in accepted:
+        normalized["n"] = int_param(params, "n", 10, 1, TOP_LIST_SIZE)
+    return normalized
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def query_etag(version, requests, batch=False):
+    key = json.dumps([version, requests, batch], sort_keys=True)
+    return '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def all_values(dataset, column, selected):
+    # Sem o parâmetro, todos os valores da coluna
+    if selected is not None:
+        return selected
+    return list(dataset.indexes["country"].values if column == "country" else dataset.cuisines)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def country_aggregates(dataset, countries=None):
+    # Os números de figura1-4 (página Países)
+    cube = dataset.query_cube
+    q = queries(cube)
+    cube = q.select_countries(cube, all_values(dataset, "country", countries))
+    return {
+        "restaurants": records(q.restaurants_by_country(cube)),
+        "cities": records(q.cities_by_country(cube)),
+        "mean_votes": records(q.mean_by_country(cube, "votes", "votes")),
+        "mean_cost_for_two": records(q.mean_by_country(cube, "cost_for_two", "average_cost_for_two")),
+    }
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def city_aggregates(dataset, countries=None, limit=10):
+    # Os números dos gráficos da página Cidades (as páginas mostram 10, 7, 7 e 10 cidades)
+    cube = dataset.query_cube
+    q = queries(cube)
+    cube = q.select_countries(cube, all_values(dataset, "country", countries))
+    return {
+        "restaurants": records(q.restaurants_by_city(cube).head(limit)),
+        "rating_above_4": records(q.restaurants_by_city(cube, "rating_above_4").head(limit)),
+        "rating_below_2_5": records(q.restaurants_by_city(cube, "rating_below_2_5").head(limit)),
+        "distinct_cuisines": records(q.cuisines_by_city(cube).head(limit)),
+    }
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def home_metrics(dataset):
+    # As métricas do topo da Home (sempre sobre o dataset inteiro)
+    df = dataset.df
+    return {
+        "restaurants": len(df),
+        "countries": df["country"].nunique(),
+        "cities": df["city"].nunique(),
+        "votes": df["votes"].sum(),
+        "cuisines": df["cuisines"].nunique(),
+    }
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def top_restaurants(dataset, countries=None, cuisines=None, n=10):
+    # Os N melhores restaurantes e os N melhores e piores tipos de culinária (página Culinária)
+    views = dataset.views
+    countries = all_values(dataset, "country", countries)
+    cuisines = all_values(dataset, "cuisines", cuisines)
+    ratings = cuisine_ratings(views.select("ratings", countries, cuisines=cuisines))
+    return {
+        "restaurants": records(top_k(views.select("top", countries, cuisines=cuisines)[TOP_COLUMNS], n,
+                                     "aggregate_rating", "restaurant_id")),
+        "best_cuisines": records(top_k(ratings, n, "aggregate_rating", "cuisines")),
+        "worst_cuisines": records(top_k(ratings, n, "aggregate_rating", "cuisines", ascending=True)),
+    }
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def restaurants_by_id(dataset, ids):
+    # Busca direta pelo índice hash restaurant_id -> linha; ids desconhecidos ficam de fora
+    rows = dataset.indexes["restaurant_id"].rows(ids)
+    return {"restaurants": records(dataset.df[VIEW_COLUMNS].take(rows))}
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+QUERIES = {
+    "countries": country_aggregates,
+    "cities": city_aggregates,
+    "metrics": home_metrics,
+    "top": top_restaurants,
+    "restaurants": restaurants_by_id,
+}
+QUERY_PARAMS = {
+    "countries": ["countries"],
+    "cities": ["countries", "limit"],
+    "metrics": [],
+    "top": ["countries", "cuisines", "n"],
+    "restaurants": ["ids"],
+}
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def run_query(dataset, name, params):
+    return QUERIES[name](dataset, **params)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def make_app(store):
+    handler_args = {"store": store, "cache": LRUCache(RESPONSE_CACHE_SIZE)}
+    return tornado.web.Application(
+        [
+            (r"/api/version", VersionHandler, handler_args),
+            (r"/api/batch", BatchHandler, handler_args),
+            (r"/api/(countries|cities|metrics|top|restaurants)", QueryHandler, handler_args),
+        ],
+        # gzip nas respostas para clientes que enviam Accept-Encoding: gzip
+        compress_response=True,
+    )
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.api",
+        description="API JSON local com os agregados do dashboard Fome Zero.",
+    )
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--address", default="127.0.0.1", help="endereço de escuta (padrão: só a máquina local)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    # Mesma fonte de dados do dashboard, inclusive os deltas incorporados em segundo plano
+    store = DatasetStore()
+    store.watch()
+    make_app(store).listen(args.port, args.address)
+    logger.info("API em http://%s:%d/api (versão %s)", args.address, args.port, store.current.version)
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from utils.cube import CUBE_DIMENSIONS, sort_dimensions
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+# Backend "arrow" (FOME_ZERO_BACKEND=arrow): as mesmas consultas de utils.cube e
+# utils.charts, com os mesmos nomes e resultados, feitas com os kernels do
+# pyarrow.compute (group_by/filter usam todos os núcleos, sem o GIL). As chaves
+# continuam dicionários (o equivalente Arrow das categorias) até a ordenação final.
+ROW_COLUMNS = [*CUBE_DIMENSIONS, "restaurant_id", "votes", "average_cost_for_two", "aggregate_rating"]
+
+COUNT_ALL = pc.CountOptions(mode="all")
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def to_table(df):
+    # Colunas usadas pelas consultas; categorias viram dicionários sem copiar os códigos.
+    return pa.Table.from_pandas(df[[c for c in ROW_COLUMNS if c in df.columns]], preserve_index=False)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def cube_table(cube):
+    return pa.Table.from_pandas(cube.reset_index(), preserve_index=False)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def decode(table):
+    # Dicionários viram texto: o sort_by do Arrow não ordena colunas de dicionário.
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table[field.name].cast(pa.string()))
+    return table
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def to_frame(table, keys):
+    # Resultado pequeno em pandas, na ordem do groupby(observed=True) do backend
+    # pandas (chaves como categorias em ordem alfabética). A ordenação final é a
+    # mesma do utils.cube: os empates do sort_values dependem do quicksort do
+    # numpy, então só o próprio sort_values devolve a mesma ordem.
+    table = decode(table).sort_by([(key, "ascending") for key in keys])
+    return table.to_pandas().astype({key: "category" for key in keys})
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def build_cube(df):
+    table = to_table(df)
+    rating = table["aggregate_rating"]
+    table = (table.append_column("rating_above_4", pc.greater_equal(rating, 4).cast(pa.int64()))
+                  .append_column("rating_below_2_5", pc.less_equal(rating, 2.5).cast(pa.int64()))
+                  .set_column(table.schema.get_field_index("votes"), "votes", table["votes"].cast(pa.int64()))
+                  .set_column(table.schema.get_field_index("average_cost_for_two"), "average_cost_for_two",
+                              table["average_cost_for_two"].cast(pa.int64())))
+    grouped = table.group_by(CUBE_DIMENSIONS).aggregate([
+        ("restaurant_id", "count", COUNT_ALL),
+        ("votes", "sum"),
+        ("average_cost_for_two", "sum"),
+        ("rating_above_4", "sum"),
+        ("rating_below_2_5", "sum"),
+    ])
+    cube = pd.DataFrame({
+        "rows": grouped["restaurant_id_count"].to_numpy(),
+        "votes": grouped["votes_sum"].to_numpy(),
+        "cost_for_two": grouped["average_cost_for_two_sum"].to_numpy(),
+        "rating_above_4": grouped["rating_above_4_sum"].to_numpy(),
+        "rating_below_2_5": grouped["rating_below_2_5_sum"].to_numpy(),
+    }, index=pd.MultiIndex.from_arrays([grouped[dim].to_pandas() for dim in CUBE_DIMENSIONS], names=CUBE_DIMENSIONS))
+    return sort_dimensions(cube)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def is_in(column, values):
+    # Em colunas de dicionário o is_in roda só sobre os valores distintos e a
+    # máscara das linhas sai de um take pelos índices, sem decodificar o texto.
+    value_set = pa.array(list(values), pa.string())
+    if not pa.types.is_dictionary(column.type):
+        return pc.is_in(column, value_set=value_set)
+    return pa.chunked_array([pc.take(pc.is_in(chunk.dictionary, value_set=value_set), chunk.indices)
+                             for chunk in column.chunks], pa.bool_())
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def select_rows(table, **columns):
+    # Linhas cujo valor de cada coluna está na seleção, ex.: select_rows(t, country=[...], cuisines=[...]).
+    mask = None
+    for column, values in columns.items():
+        selected = is_in(table[column], values)
+        mask = selected if mask is None else pc.and_(mask, selected)
+    return table if mask is None else table.filter(mask)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def select_countries(cube, countries):
+    return select_rows(cube, country=countries)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def restaurants_by_country(cube):
+    grouped = cube.group_by("country").aggregate([("rows", "sum")])
+    df_aux = to_frame(pa.table({"country": grouped["country"], "restaurant_id": grouped["rows_sum"]}), ["country"])
+    return df_aux.sort_values("restaurant_id", ascending=False).reset_index(drop=True)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def cities_by_country(cube):
+    grouped = cube.group_by("country").aggregate([("city", "count_distinct")])
+    df_aux = to_frame(pa.table({"country": grouped["country"], "city": grouped["city_count_distinct"]}), ["country"])
+    return df_aux.sort_values("city", ascending=False).reset_index(drop=True)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def mean_by_country(cube, column, name):
+    grouped = cube.group_by("country").aggregate([(column, "sum"), ("rows", "sum")])
+    mean = pc.divide(grouped[f"{column}_sum"].cast(pa.float64()), grouped["rows_sum"].cast(pa.float64()))
+    df_aux = to_frame(pa.table({"country": grouped["country"], name: mean}), ["country"])
+    return np.round(df_aux.sort_values(name, ascending=False).reset_index(drop=True), 2)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def restaurants_by_city(cube, column="rows"):
+    grouped = cube.group_by(["country", "city"]).aggregate([(column, "sum")])
+    grouped = grouped.filter(pc.greater(grouped[f"{column}_sum"], 0))
+    df_aux = to_frame(pa.table({"country": grouped["country"], "city": grouped["city"],
+                                "restaurant_id": grouped[f"{column}_sum"]}), ["country", "city"])
+    return df_aux.sort_values(["restaurant_id", "city"], ascending=[False, True]).reset_index(drop=True)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def cuisines_by_city(cube):
+    grouped = cube.group_by(["country", "city"]).aggregate([("cuisines", "count_distinct")])
+    df_aux = to_frame(pa.table({"country": grouped["country"], "city": grouped["city"],
+                                "cuisines": grouped["cuisines_count_distinct"]}), ["country", "city"])
+    return df_aux.sort_values(["cuisines", "city"], ascending=[False, True]).reset_index(drop=True)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def cuisine_ratings(table):
+    grouped = table.group_by("cuisines").aggregate([("aggregate_rating", "max")])
+    return to_frame(pa.table({"cuisines": grouped["cuisines"], "aggregate_rating": grouped["aggregate_rating_max"]}), ["cuisines"])
@@ -0,0 +1,141 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import plotly.express as px
+import pyarrow as pa
+
+from utils import arrow_query
+from utils import cube as pandas_query
+from utils.topk import top_k
+
+# ===========================================================================================
+#                                       CONSULTAS
+# ===========================================================================================
+
+def queries(data):
+    # Tabelas Arrow (FOME_ZERO_BACKEND=arrow) usam as consultas do pyarrow.compute;
+    # DataFrames, as do pandas. As duas devolvem os mesmos DataFrames.
+    return arrow_query if isinstance(data, pa.Table) else pandas_query
+
+# ===========================================================================================
+#                                       PAÍSES
+# ===========================================================================================
+
+def figura1(cube):
+    df_aux = queries(cube).restaurants_by_country(cube)
+    fig = px.bar(df_aux, 'country', y='restaurant_id', text="restaurant_id",
+                 title="Quantidade de Restaurantes Registrados por País",
+                 labels={"country": "Países", "restaurant_id": "Quantidade de Restaurantes",}
+                )
+    return fig 
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def figura2(cube):
+    df_aux = queries(cube).cities_by_country(cube)
+    fig = px.bar(df_aux, 'country', y='city', text="city",
+                 title="Quantidade de cidades Registrados por País",
+                 labels={"country": "Países", "city": "Quantidade de cidades",}
+                )
+    return fig 
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def figura3(cube):
+    df_aux = queries(cube).mean_by_country(cube, 'votes', 'votes')
+    fig = px.bar(df_aux, 'country', y='votes', text="votes",
+                 title="Média de avaliação por País",
+                 labels={"country": "Países", "votes": "Quantidade de votos",}
+                )
+    return fig 
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def figura4(cube):
+    df_aux = queries(cube).mean_by_country(cube, 'cost_for_two', 'average_cost_for_two')
+    fig = px.bar(df_aux, 'country', y='average_cost_for_two', text="average_cost_for_two",
+             title="Quantidade de Restaurantes Registrados por País",
+             labels={"country": "Países", "average_cost_for_two": "Média de preço para dois",}
+            )
+    return fig
+
+# ===========================================================================================
+#                                       CIDADES
+# ===========================================================================================
+
+def top_cities_restaurants(cube):
+    df_aux = queries(cube).restaurants_by_city(cube)
+
+    fig = px.bar(df_aux.head(10),x="city", y="restaurant_id",text="restaurant_id", text_auto=".2f",color="country", title="Top 10 Cidades com mais Restaurantes na Base de Dados",
+                 labels={"city": "Cidade", "restaurant_id": "Quantidade de Restaurantes", "country": "País"})
+    return fig
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+
+def top_7_cities_4(cube):
+    df_aux = queries(cube).restaurants_by_city(cube, 'rating_above_4')
+
+    fig = px.bar(
+        df_aux.head(7),
+        x="city",
+        y="restaurant_id",
+        text="restaurant_id",
+        text_auto=".2f",
+        color="country",
+        title="Top 7 Cidades com Avaliação média Acima de 4",
+        labels={
+            "city": "Cidade",
+            "restaurant_id": "Quantidade de Restaurantes",
+            "country": "País"
+        }
+    )
+    return fig
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+
+def top_worst_cities_4(cube):
+    df_aux = queries(cube).restaurants_by_city(cube, 'rating_below_2_5')
+
+    fig = px.bar(
+        df_aux.head(7),
+        x="city",
+        y="restaurant_id",
+        text="restaurant_id",
+        text_auto=".2f",
+        color="country",
+        title="Top 7 Cidades com Avaliação média Abaixo de 2.5",
+        labels={
+            "city": "Cidade",
+            "restaurant_id": "Quantidade de Restaurantes",
+            "country": "País"
+        }
+    )
+    return fig
+
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+
+def top_cuisine_cities(cube):
+    df_aux = queries(cube).cuisines_by_city(cube)
+
+    fig = px.bar(
+        df_aux.head(10),
+        x="city",
+        y="cuisines",
+        text="cuisines",
+        text_auto=".2f",
+        color="country",
+        title="Top 10 Cidades mais restaurantes com tipos culinários distintos",
+        labels={
+            "city": "Cidade",
+            "cuisines": "Quantidade dCulinárias Distintas",
+            "country": "País"
+        }
+    )
+    return fig
+
+# ===========================================================================================
+#                                       CULINÁRIA
+# ===========================================================================================
+
+def cuisine_ratings(df1):
+    if isinstance(df1, pa.Table):
+        return arrow_query.cuisine_ratings(df1)
+    return df1.loc[:,['cuisines', 'aggregate_rating']].groupby('cuisines', observed=True).max().reset_index()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def top_cuisine(df_ratings, top_b, top_n):
+    df_aux = top_k(df_ratings, top_n, 'aggregate_rating', 'cuisines', ascending=top_b)
+    fig = px.bar(df_aux, x='cuisines', y='aggregate_rating', labels={"cuisines": "Tipo de Culinária", "aggregate_rating": "Avaliação Média",})
+    return fig
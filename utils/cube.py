@@ -0,0 +1,107 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.data import (CLEANING_VERSION_KEY, DATA_SOURCE, SNAPSHOT_PATH, cleaning_version, same_cleaning_version,
+                        snapshot_is_current, snapshot_is_fresh)
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+# Cubo de agregação pré-calculado: uma linha por combinação observada de
+# (country, city, cuisines, price_type) com contagens e somas aditivas. Os
+# gráficos de País e Cidades são respondidos somando apenas as fatias dos países
+# selecionados, então o custo não depende mais da quantidade de restaurantes.
+CUBE_DIMENSIONS = ["country", "city", "cuisines", "price_type"]
+
+# O cubo é gravado ao lado do snapshot pelo `python -m utils.etl`; enquanto os
+# dois estiverem atualizados, as páginas leem o cubo pronto em vez de recalculá-lo.
+CUBE_PATH = SNAPSHOT_PATH.with_suffix(".cube.parquet")
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def build_cube(df):
+    rating = df["aggregate_rating"]
+    cube = (df.assign(votes=df["votes"].astype("int64"),
+                      average_cost_for_two=df["average_cost_for_two"].astype("int64"),
+                      rating_above_4=rating >= 4,
+                      rating_below_2_5=rating <= 2.5)
+              .groupby(CUBE_DIMENSIONS, observed=True)
+              # Com o dataset deduplicado, cada linha é um restaurante distinto e a
+              # contagem de linhas já é a contagem de restaurantes.
+              .agg(rows=("restaurant_id", "size"),
+                   votes=("votes", "sum"),
+                   cost_for_two=("average_cost_for_two", "sum"),
+                   rating_above_4=("rating_above_4", "sum"),
+                   rating_below_2_5=("rating_below_2_5", "sum")))
+
+    return cube.sort_index()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def merge_cubes(*cubes):
+    # Todas as medidas são somas, então cubos de partes disjuntas do dataset
+    # (ex.: blocos lidos em sequência) se combinam somando as mesmas células.
+    return sort_dimensions(pd.concat(cubes).groupby(level=CUBE_DIMENSIONS, observed=True).sum())
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def sort_dimensions(cube):
+    # Dimensões como categorias em ordem alfabética, igual ao build_cube do dataset inteiro.
+    index = cube.index.to_frame(index=False).astype({dim: str for dim in CUBE_DIMENSIONS}).astype("category")
+    cube.index = pd.MultiIndex.from_frame(index)
+    return cube.sort_index()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def write_cube(cube, attrs=None, path=CUBE_PATH):
+    table = pa.Table.from_pandas(cube)
+    metadata = {**(table.schema.metadata or {}), b"fome_zero.attrs": json.dumps(attrs or {}).encode(),
+                CLEANING_VERSION_KEY: cleaning_version().encode()}
+    pq.write_table(table.replace_schema_metadata(metadata), path)
+    return path
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def read_cube(path=CUBE_PATH):
+    table = pq.read_table(path)
+    cube = sort_dimensions(table.to_pandas())
+    cube.attrs.update(json.loads((table.schema.metadata or {}).get(b"fome_zero.attrs", b"{}")))
+    return cube
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def cube_is_fresh(path=CUBE_PATH):
+    return (DATA_SOURCE != "csv" and snapshot_is_current() and snapshot_is_fresh(path, SNAPSHOT_PATH)
+            and same_cleaning_version(path))
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def select_countries(cube, countries):
+    # Fatia do cubo com os países selecionados (busca no índice, sem varrer linhas).
+    present = [c for c in cube.index.levels[0] if c in set(countries)]
+    return cube.loc[present]
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def restaurants_by_country(cube):
+    df_aux = cube.groupby("country", observed=True)["rows"].sum().rename("restaurant_id")
+    return df_aux.to_frame().sort_values("restaurant_id", ascending=False).reset_index()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def cities_by_country(cube):
+    cities = cube.index.droplevel(["cuisines", "price_type"]).unique().to_frame(index=False)
+    df_aux = cities.groupby("country", observed=True).size().rename("city")
+    return df_aux.to_frame().sort_values("city", ascending=False).reset_index()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def mean_by_country(cube, column, name):
+    totals = cube.groupby("country", observed=True)[[column, "rows"]].sum()
+    df_aux = (totals[column] / totals["rows"]).rename(name)
+    return np.round(df_aux.to_frame().sort_values(name, ascending=False).reset_index(), 2)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def restaurants_by_city(cube, column="rows"):
+    # Quantidade de restaurantes por cidade, opcionalmente contando apenas os
+    # restaurantes com nota acima de 4 ou abaixo de 2.5 (rating_above_4 / rating_below_2_5).
+    df_aux = cube.groupby(["country", "city"], observed=True)[column].sum().rename("restaurant_id")
+    df_aux = df_aux[df_aux > 0]
+    return df_aux.to_frame().sort_values(["restaurant_id", "city"], ascending=[False, True]).reset_index()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def cuisines_by_city(cube):
+    cuisines = cube.index.droplevel("price_type").unique().to_frame(index=False)
+    df_aux = cuisines.groupby(["country", "city"], observed=True).size().rename("cuisines")
+    return df_aux.to_frame().sort_values(["cuisines", "city"], ascending=[False, True]).reset_index()
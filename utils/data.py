@@ -0,0 +1,471 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import inflection
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.timing import span
+
+# Com Copy-on-Write as cópias rasas entregues às páginas compartilham os dados
+# do frame em cache e só copiam uma coluna se alguém tentar modificá-la.
+pd.set_option("mode.copy_on_write", True)
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+DATASET_PATH = Path(__file__).resolve().parent.parent / "dataset" / "zomato.csv"
+SNAPSHOT_PATH = DATASET_PATH.with_suffix(".arrow")
+
+# Origem dos dados no dashboard: "csv", "snapshot" ou "auto" (snapshot quando
+# existir e estiver atualizado em relação ao CSV, senão o CSV).
+DATA_SOURCE = os.environ.get("FOME_ZERO_SOURCE", "auto")
+
+# Motor das agregações das páginas: "pandas" (groupby) ou "arrow" (kernels
+# multi-thread do pyarrow.compute sobre tabelas Arrow). Os resultados são os mesmos.
+QUERY_BACKEND = os.environ.get("FOME_ZERO_BACKEND", "pandas")
+
+# Cache em disco do CSV já tratado, identificado pelo conteúdo do CSV e pela
+# versão do código de limpeza. Guarda as CLEAN_CACHE_KEEP versões mais recentes
+# de cada arquivo, então voltar a um CSV anterior também é instantâneo.
+CLEAN_CACHE_DIR = Path(os.environ.get("FOME_ZERO_CLEAN_CACHE",
+                                      Path(__file__).resolve().parent.parent / ".cache" / "clean"))
+CLEAN_CACHE_KEEP = 3
+
+# Metadado do snapshot e do cubo com a versão do código de limpeza que os gerou;
+# com outra versão eles são tratados como desatualizados, mesmo mais novos que o CSV.
+CLEANING_VERSION_KEY = b"fome_zero.cleaning_version"
+
+# Permissão dos arquivos publicados a partir de um temporário do mkstemp (criado
+# com 0600): a mesma de um open() comum, para que o ETL, a API e o servidor
+# possam rodar com usuários diferentes. O umask é lido uma vez, na importação.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+logger = logging.getLogger(__name__)
+
+COUNTRIES = {
+   1: "India",
+   14: "Australia",
+   30: "Brazil",
+   37: "Canada",
+   94: "Indonesia",
+   148: "New Zeland",
+   162: "Philippines",
+   166: "Qatar",
+   184: "Singapure",
+   189: "South Africa",
+   191: "Sri Lanka",
+   208: "Turkey",
+   214: "United Arab Emirates",
+   215: "England",
+   216: "United States of America",
+}
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+
+COLORS = {
+   "3F7E00": "darkgreen",
+   "5BA829": "green",
+   "9ACD32": "lightgreen",
+   "CDD614": "orange",
+   "FFBA00": "red",
+   "CBCBC8": "darkred",
+   "FF7800": "darkred",
+}
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+
+COLUMNS_ORDER = [
+    "restaurant_id",
+    "restaurant_name",
+    "country",
+    "city",
+    "address",
+    "locality",
+    "locality_verbose",
+    "longitude",
+    "latitude",
+    "cuisines",
+    "price_type",
+    "average_cost_for_two",
+    "currency",
+    "has_table_booking",
+    "has_online_delivery",
+    "is_delivering_now",
+    "aggregate_rating",
+    "rating_color",
+    "color_name",
+    "rating_text",
+    "votes",
+]
+
+# Representação compacta em memória: colunas de texto repetitivas viram
+# categóricas (codificadas em dicionário) e os números usam o menor tipo que
+# comporta os valores. aggregate_rating segue float64 para que notas como 4.6
+# continuem sendo exibidas sem ruído de arredondamento nos gráficos e tabelas.
+CATEGORY_COLUMNS = [
+    "country",
+    "city",
+    "locality",
+    "cuisines",
+    "price_type",
+    "currency",
+    "rating_color",
+    "color_name",
+    "rating_text",
+]
+
+NUMERIC_DTYPES = {
+    "restaurant_id": "int32",
+    "longitude": "float32",
+    "latitude": "float32",
+    "average_cost_for_two": "int32",
+    "has_table_booking": "int8",
+    "has_online_delivery": "int8",
+    "is_delivering_now": "int8",
+    "votes": "int32",
+}
+
+# Colunas que as páginas e a API usam. As demais (endereço, localidade, entrega,
+# texto da nota...) só aparecem no export e não ficam no frame do servidor: são
+# lidas do arquivo já tratado quando alguém exporta (utils/store.py, ColdColumns).
+SERVING_COLUMNS = [
+    "restaurant_id",
+    "restaurant_name",
+    "country",
+    "city",
+    "longitude",
+    "latitude",
+    "cuisines",
+    "price_type",
+    "average_cost_for_two",
+    "currency",
+    "aggregate_rating",
+    "color_name",
+    "votes",
+]
+
+DEFAULT_COUNTRIES = ["Brazil", "England", "Qatar", "South Africa", "Canada", "Australia"]
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def rename_columns(df):
+    title = lambda x: inflection.titleize(x) 
+    snakecase = lambda x: inflection.underscore(x) 
+    spaces = lambda x: x.replace(" ", "")
+    cols_old = list(df.columns)
+    cols_old = list(map(title, cols_old))
+    cols_old = list(map(spaces, cols_old)) 
+    cols_new = list(map(snakecase, cols_old))
+    # Com copy-on-write o set_axis devolve um frame novo sobre os mesmos arrays
+    return df.set_axis(cols_new, axis=1)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def country_name(country_id):
+    return COUNTRIES[country_id]
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def create_price_tye(price_range):
+    if price_range == 1:
+        return "cheap"
+    elif price_range == 2: 
+        return "normal"
+    elif price_range == 3: 
+        return "expensive"
+    else:
+        return "gourmet"
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def color_name(color_code): 
+    return COLORS[color_code]
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def adjust_columns_order(dataframe):
+    # Seleção de colunas sem cópia (copy-on-write)
+    return dataframe.loc[:, COLUMNS_ORDER]
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def map_unique(series, func):
+    # Equivalente vetorizado de series.apply(func): a coluna é codificada em
+    # dicionário (pd.factorize), func roda uma vez por valor distinto e o
+    # resultado volta para as linhas com um único take sobre os códigos.
+    codes, uniques = pd.factorize(series)
+    values = np.array([func(x) for x in uniques] + [np.nan], dtype=object)
+    return pd.Series(values.take(codes), index=series.index, name=series.name)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def clean_code(df1):
+    df1 = df1.dropna()
+    df1["country"] = map_unique(df1.loc[:, "country_code"], country_name)
+    df1["price_type"] = map_unique(df1.loc[:, "price_range"], create_price_tye)
+    df1["color_name"] = map_unique(df1.loc[:, "rating_color"], color_name)
+    df1["cuisines"] = map_unique(df1.loc[:, "cuisines"], lambda x: x.split(",")[0])
+    return df1
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def deduplicate(df):
+    # Um registro por restaurant_id. A quantidade de linhas descartadas fica em
+    # df.attrs["duplicates"]; depois disso contagens simples substituem nunique().
+    repeated = df["restaurant_id"].duplicated(keep="first")
+    df = df.loc[~repeated]
+    df.attrs["duplicates"] = int(repeated.sum())
+    return df
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def compact_dtypes(df):
+    dtypes = {col: "category" for col in CATEGORY_COLUMNS if col in df.columns}
+    dtypes.update({col: dtype for col, dtype in NUMERIC_DTYPES.items() if col in df.columns})
+    df = df.astype(dtypes)
+    # Categorias em ordem alfabética, como o astype gera a partir de texto. Snapshots
+    # gravados em blocos trazem as categorias na ordem em que apareceram no CSV.
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not df[col].cat.categories.is_monotonic_increasing:
+            df[col] = df[col].cat.reorder_categories(df[col].cat.categories.sort_values())
+    return df
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def memory_footprint(df):
+    # Memória ocupada por coluna, em bytes, contando o conteúdo das strings.
+    return df.memory_usage(index=True, deep=True)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def load_dataset(path=DATASET_PATH):
+    # Importando o Data set
+    with span("read_csv"):
+        df = pd.read_csv(path)
+
+    # Renomeando as Colunas
+    with span("rename_columns"):
+        df = rename_columns(df)
+
+    # Limpeza dos dados
+    with span("clean_code"):
+        df = clean_code(df)
+
+    # Removendo restaurantes duplicados
+    with span("deduplicate"):
+        df = deduplicate(df)
+    if df.attrs["duplicates"]:
+        logger.warning("%d restaurantes duplicados descartados de %s", df.attrs["duplicates"], path)
+
+    # Organizando as Colunas
+    with span("adjust_columns_order"):
+        df = adjust_columns_order(df)
+
+    # Tipos compactos
+    with span("compact_dtypes"):
+        return compact_dtypes(df)
+
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def cleaning_version():
+    # Muda sempre que o código ou as tabelas usadas na limpeza mudam (e com a
+    # versão do pandas, que define os tipos gerados), invalidando o cache.
+    steps = [load_dataset, rename_columns, clean_code, map_unique, country_name, create_price_tye, color_name,
+             deduplicate, adjust_columns_order, compact_dtypes]
+    tables = [COUNTRIES, COLORS, COLUMNS_ORDER, CATEGORY_COLUMNS, NUMERIC_DTYPES, pd.__version__]
+    key = "\n".join(inspect.getsource(step) for step in steps) + json.dumps(tables, sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def file_sha1(path, block=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, "rb") as source:
+        while chunk := source.read(block):
+            digest.update(chunk)
+    return digest.hexdigest()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def source_fingerprint(path, known=None):
+    # Tamanho, mtime e hash do conteúdo. O hash só é recalculado se o tamanho ou
+    # o mtime mudarem; um arquivo regravado com o mesmo conteúdo mantém o hash.
+    stat = Path(path).stat()
+    if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+        return known
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": file_sha1(path)}
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def clean_cache_path(path, fingerprint, version, cache_dir=CLEAN_CACHE_DIR):
+    return Path(cache_dir) / f"{Path(path).stem}-{fingerprint['sha1'][:16]}-{version}.arrow"
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def publish_file(tmp, path):
+    # Troca atômica do temporário pelo arquivo final, com a permissão de FILE_MODE
+    os.chmod(tmp, FILE_MODE)
+    os.replace(tmp, path)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def read_fingerprints(cache_dir=CLEAN_CACHE_DIR):
+    try:
+        return json.loads((Path(cache_dir) / "fingerprints.json").read_text())
+    except (OSError, ValueError):
+        return {}
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def remember_fingerprint(path, fingerprint, cache_dir=CLEAN_CACHE_DIR):
+    fingerprints = read_fingerprints(cache_dir)
+    fingerprints[str(Path(path).resolve())] = fingerprint
+    # Temporário exclusivo: sessões e processos (dashboard e API) gravam ao mesmo tempo
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, prefix="fingerprints.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as target:
+            target.write(json.dumps(fingerprints, indent=2))
+        publish_file(tmp, Path(cache_dir) / "fingerprints.json")
+    finally:
+        Path(tmp).unlink(missing_ok=True)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def store_clean_cache(df, path, fingerprint, cached, cache_dir=CLEAN_CACHE_DIR):
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, prefix=f"{cached.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        write_snapshot(df, tmp)
+        publish_file(tmp, cached)
+    finally:
+        Path(tmp).unlink(missing_ok=True)
+    remember_fingerprint(path, fingerprint, cache_dir)
+
+    # Só as versões mais recentes de cada arquivo ficam no disco
+    entries = sorted(cache_dir.glob(f"{Path(path).stem}-*-*.arrow"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in entries[CLEAN_CACHE_KEEP:]:
+        old.unlink(missing_ok=True)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def load_cleaned(path=DATASET_PATH, cache_dir=CLEAN_CACHE_DIR):
+    # load_dataset com cache em disco: a mesma combinação de conteúdo do CSV e
+    # código de limpeza é tratada uma única vez, e as próximas leituras (ex.: a
+    # cada reinício do servidor) carregam o resultado já tratado.
+    path = Path(path)
+    with span("fingerprint"):
+        known = read_fingerprints(cache_dir).get(str(path.resolve()))
+        fingerprint = source_fingerprint(path, known)
+        cached = clean_cache_path(path, fingerprint, cleaning_version(), cache_dir)
+
+    if cached.exists():
+        try:
+            with span("read_clean_cache"):
+                df = read_snapshot(cached)
+        except (OSError, pa.ArrowInvalid):
+            logger.exception("Cache do dataset tratado ilegível: %s", cached)
+        else:
+            if fingerprint != known:
+                # Mesmo conteúdo com outro mtime: o próximo início não precisa refazer o hash
+                try:
+                    remember_fingerprint(path, fingerprint, cache_dir)
+                except OSError:
+                    pass
+            return df
+
+    df = load_dataset(path)
+    try:
+        with span("write_clean_cache"):
+            store_clean_cache(df, path, fingerprint, cached, cache_dir)
+    except OSError:
+        # Sem permissão de escrita o app segue funcionando, só sem o cache
+        logger.exception("Não foi possível gravar o cache do dataset tratado em %s", cache_dir)
+    return df
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def write_snapshot(df, path=SNAPSHOT_PATH):
+    # Snapshot colunar tipado: Arrow IPC (mapeável em memória) ou Parquet.
+    path = Path(path)
+    table = pa.Table.from_pandas(df)
+    # df.attrs (ex.: a contagem de duplicados) não é preservado pelo Arrow.
+    metadata = {**(table.schema.metadata or {}), b"fome_zero.attrs": json.dumps(df.attrs).encode(),
+                CLEANING_VERSION_KEY: cleaning_version().encode()}
+    table = table.replace_schema_metadata(metadata)
+    if path.suffix == ".parquet":
+        pq.write_table(table, path)
+    else:
+        with pa.OSFile(str(path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    return path
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def read_snapshot(path=SNAPSHOT_PATH, columns=None):
+    # Com `columns`, só essas colunas (e o índice) saem do arquivo
+    path = Path(path)
+    if path.suffix == ".parquet":
+        table = pq.read_table(path, columns=columns, memory_map=True, use_pandas_metadata=True)
+    else:
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            index = [c for c in (table.schema.pandas_metadata or {}).get("index_columns", []) if isinstance(c, str)]
+            table = table.select([*columns, *index])
+    # Snapshots antigos, gravados antes dos tipos compactos, são convertidos aqui.
+    df = compact_dtypes(table.to_pandas())
+    df.attrs.update(snapshot_attrs(path, table.schema))
+    return df
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def read_columns(path, columns):
+    # Colunas de um snapshot (as que ele tiver) como tabela Arrow, na ordem das
+    # linhas. Arrow IPC fica mapeado em memória: o sistema lê do disco só as
+    # páginas usadas.
+    path = Path(path)
+    if path.suffix == ".parquet":
+        names = pq.read_schema(path).names
+        return pq.read_table(path, columns=[c for c in columns if c in names], memory_map=True)
+    table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    return table.select([c for c in columns if c in table.column_names])
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def snapshot_attrs(path, schema):
+    # O snapshot do --stream é escrito antes de se saber quantos duplicados havia
+    # (o schema vai no início do arquivo), então os attrs ficam só no cubo gravado
+    # junto com ele; nesse caso vêm do cubo, se ele for da mesma execução.
+    metadata = schema.metadata or {}
+    if b"fome_zero.attrs" in metadata:
+        return json.loads(metadata[b"fome_zero.attrs"])
+    cube_path = Path(path).with_suffix(".cube.parquet")
+    if snapshot_is_fresh(cube_path, path):
+        metadata = pq.read_schema(cube_path).metadata or {}
+        return json.loads(metadata.get(b"fome_zero.attrs", b"{}"))
+    return {}
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def snapshot_is_fresh(path=SNAPSHOT_PATH, source=DATASET_PATH):
+    path, source = Path(path), Path(source)
+    if not path.exists():
+        return False
+    return not source.exists() or path.stat().st_mtime >= source.stat().st_mtime
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def file_metadata(path):
+    # Metadados do schema de um Parquet ou Arrow IPC, sem ler os dados
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return pq.read_schema(path).metadata or {}
+    with pa.memory_map(str(path)) as source:
+        return pa.ipc.open_file(source).schema.metadata or {}
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def same_cleaning_version(path):
+    try:
+        return file_metadata(path).get(CLEANING_VERSION_KEY) == cleaning_version().encode()
+    except (OSError, pa.ArrowInvalid):
+        return False
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def snapshot_is_current(path=SNAPSHOT_PATH, source=DATASET_PATH):
+    # Mais novo que o CSV e gerado pelo código de limpeza atual
+    return snapshot_is_fresh(path, source) and same_cleaning_version(path)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def dataset_version(path=DATASET_PATH):
+    # Identificador curto da versão dos dados, derivado do arquivo de origem.
+    stat = Path(path).stat()
+    key = f"{Path(path).name}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def use_snapshot(source=DATA_SOURCE):
+    if source == "snapshot" and not snapshot_is_current():
+        logger.warning("Snapshot %s desatualizado em relação ao CSV ou ao código de limpeza", SNAPSHOT_PATH)
+    if source not in ("auto", "csv", "snapshot"):
+        raise ValueError(f"Origem de dados desconhecida: {source!r}")
+    return source == "snapshot" or (source == "auto" and snapshot_is_current())
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def load_data(source=DATA_SOURCE):
+    if use_snapshot(source):
+        with span("read_snapshot"):
+            return read_snapshot()
+    return load_cleaned()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def data_file(source=DATA_SOURCE, path=DATASET_PATH, cache_dir=CLEAN_CACHE_DIR):
+    # Arquivo já tratado de onde os dados podem ser lidos por colunas: o snapshot
+    # ou o cache da limpeza do CSV. None se o cache ainda não foi gravado.
+    if use_snapshot(source):
+        return SNAPSHOT_PATH
+    known = read_fingerprints(cache_dir).get(str(Path(path).resolve()))
+    cached = clean_cache_path(path, source_fingerprint(path, known), cleaning_version(), cache_dir)
+    return cached if cached.exists() else None
@@ -0,0 +1,56 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import argparse
+import time
+from pathlib import Path
+
+from utils.cube import build_cube, write_cube
+from utils.data import DATASET_PATH, SNAPSHOT_PATH, load_dataset, write_snapshot
+from utils.stream import STREAM_CHUNK_ROWS, stream_ingest
+from utils.views import PRECOMPUTE_WORKERS, precompute_views, write_views
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.etl",
+        description="Compila o CSV do Zomato em um snapshot colunar já tratado.",
+    )
+    parser.add_argument("--csv", type=Path, default=DATASET_PATH, help="CSV de origem")
+    parser.add_argument("--out", type=Path, default=SNAPSHOT_PATH,
+                        help="arquivo de saída (.arrow para Arrow IPC, .parquet para Parquet)")
+    parser.add_argument("--stream", action="store_true",
+                        help="lê o CSV em blocos, sem carregá-lo inteiro na memória")
+    parser.add_argument("--chunk-rows", type=int, default=STREAM_CHUNK_ROWS,
+                        help="linhas por bloco no modo --stream")
+    parser.add_argument("--workers", type=int, default=PRECOMPUTE_WORKERS,
+                        help="processos do pré-cálculo das visões por país (sem --stream)")
+    args = parser.parse_args(argv)
+    # O cubo de agregados acompanha o snapshot (zomato.arrow -> zomato.cube.parquet)
+    cube_path = args.out.with_suffix(".cube.parquet")
+    # Visões por país (zomato.arrow -> zomato.views/)
+    views_path = args.out.with_suffix(".views")
+
+    start = time.perf_counter()
+    if args.stream:
+        # As visões por país são montadas bloco a bloco, junto com o cubo
+        stats = stream_ingest(args.csv, args.out, cube_path, args.chunk_rows, views_path)
+        rows, duplicates = stats["rows"], stats["duplicates"]
+    else:
+        df = load_dataset(args.csv)
+        write_snapshot(df, args.out)
+        write_cube(build_cube(df), df.attrs, cube_path)
+        write_views(precompute_views(df, args.workers), views_path)
+        rows, duplicates = len(df), df.attrs.get("duplicates", 0)
+    elapsed = time.perf_counter() - start
+
+    print(f"{duplicates} restaurantes duplicados removidos")
+    print(f"{rows} linhas gravadas em {args.out} ({args.out.stat().st_size / 1e6:.2f} MB) em {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
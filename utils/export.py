@@ -0,0 +1,139 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import gzip
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.data import publish_file
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+EXPORT_DIR = Path(__file__).resolve().parent.parent / ".cache" / "exports"
+
+# Formato -> (extensão, tipo MIME)
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+# Linhas serializadas por vez: o arquivo é escrito em blocos, então a memória
+# usada não cresce com o tamanho do dataset exportado.
+CHUNK_ROWS = 50_000
+
+# Espaço máximo dos exports em disco; os menos recentes saem primeiro
+EXPORT_CACHE_BYTES = int(os.environ.get("FOME_ZERO_EXPORT_CACHE_MB", "1024")) * 2**20
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def export_path(version, countries, fmt):
+    # Um arquivo por (versão dos dados, seleção de países, formato).
+    key = "|".join([version, fmt, *sorted(countries)])
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return EXPORT_DIR / f"data_{digest}{EXPORT_FORMATS[fmt][0]}"
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def iter_chunks(take, rows, chunk_rows=CHUNK_ROWS):
+    # `take` monta as linhas de um bloco (ex.: Dataset.take_all ou DataFrame.take).
+    # Sempre ao menos um bloco, para que um export vazio ainda tenha cabeçalho.
+    for start in range(0, max(len(rows), 1), chunk_rows):
+        yield take(rows[start:start + chunk_rows])
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def write_csv(chunks, sink):
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(sink, index=False, sep=";", header=(i == 0))
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def write_parquet(chunks, path):
+    # Cada bloco vira um row group; o esquema é o do primeiro bloco.
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, schema=writer and writer.schema, preserve_index=False)
+            writer = writer or pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def write_export(take, rows, fmt, path):
+    # Gera o arquivo em um temporário exclusivo e só então o renomeia: as sessões
+    # são threads do mesmo processo, então cada escrita precisa do seu próprio
+    # temporário, e nenhuma sessão encontra um export pela metade.
+    path = Path(path)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt!r}")
+    if path.exists():
+        # Outra sessão já gerou o mesmo export
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    os.close(fd)
+    tmp = Path(tmp)
+
+    chunks = iter_chunks(take, rows)
+    try:
+        if fmt == "CSV":
+            with open(tmp, "w", encoding="utf-8", newline="") as sink:
+                write_csv(chunks, sink)
+        elif fmt == "CSV (gzip)":
+            with gzip.open(tmp, "wt", encoding="utf-8", newline="") as sink:
+                write_csv(chunks, sink)
+        else:
+            write_parquet(chunks, tmp)
+        # Se outra sessão terminou antes, o conteúdo é o mesmo: a troca é atômica
+        publish_file(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    prune_exports(path.parent, keep=path)
+    return path
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def prune_exports(export_dir=EXPORT_DIR, keep=None, max_bytes=EXPORT_CACHE_BYTES):
+    # Remove os exports menos recentes até o total caber em max_bytes (o recém-gerado fica)
+    entries = []
+    for entry in Path(export_dir).glob("data_*"):
+        if entry.name.endswith(".tmp"):
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries, key=lambda item: item[0]):
+        if total <= max_bytes:
+            break
+        if entry != keep:
+            entry.unlink(missing_ok=True)
+            total -= size
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def get_export(take, rows, fmt, version, countries, attempts=3):
+    # Export aberto para leitura, gerado apenas se ainda não existir. Depois de
+    # aberto, a limpeza de outra sessão (prune_exports) não o tira mais desta;
+    # se ela o apagar antes da abertura, ele é gerado de novo.
+    path = export_path(version, countries, fmt)
+    for attempt in range(attempts):
+        try:
+            data = open(path, "rb")
+        except FileNotFoundError:
+            if attempt == attempts - 1:
+                raise
+            write_export(take, rows, fmt, path)
+            continue
+        # O mtime marca o uso, para a limpeza manter os mais pedidos
+        try:
+            os.utime(data.fileno() if os.utime in os.supports_fd else path)
+        except FileNotFoundError:
+            pass
+        return data
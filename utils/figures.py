@@ -0,0 +1,97 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import os
+import threading
+
+import streamlit as st
+from cachetools import LRUCache
+
+from utils.timing import span
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+# Quantidade máxima de figuras guardadas; as menos usadas recentemente saem primeiro
+FIGURE_CACHE_SIZE = int(os.environ.get("FOME_ZERO_FIGURE_CACHE_SIZE", "256"))
+
+# Resultados grandes (mapas com centenas de milhares de pontos chegam a dezenas de
+# MB) ficam em outro cache, limitado pela soma dos tamanhos e não pela quantidade
+LARGE_CACHE_BYTES = int(os.environ.get("FOME_ZERO_LARGE_CACHE_MB", "256")) * 2**20
+
+# ===========================================================================================
+#                                       CLASSES
+# ===========================================================================================
+
+class FigureCache:
+    # Figuras plotly prontas, compartilhadas entre sessões. O st.plotly_chart só
+    # lê a figura (to_dict + to_json, ~1,5 ms), então a mesma instância pode ser
+    # desenhada por vários reruns; o que se evita é o groupby e o px.bar (~50 ms).
+    def __init__(self, maxsize=FIGURE_CACHE_SIZE, getsizeof=None):
+        # Com getsizeof, maxsize é a soma dos tamanhos das entradas (bytes)
+        self.figures = LRUCache(maxsize, getsizeof=getsizeof)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        with self.lock:
+            fig = self.figures.get(key)
+            if fig is not None:
+                self.hits += 1
+                return fig
+            self.misses += 1
+        # Montada fora do lock: duas sessões pedindo a mesma figura nova podem
+        # montá-la em paralelo, mas nenhuma espera pelas figuras das outras.
+        with span("build"):
+            fig = build()
+        with self.lock:
+            try:
+                self.figures[key] = fig
+            except ValueError:
+                # Maior que o cache inteiro: é usada neste rerun, mas não fica guardada
+                pass
+        return fig
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.figures),
+                    "currsize": self.figures.currsize, "maxsize": self.figures.maxsize}
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def normalize(value):
+    # Seleções de multiselect viram conjuntos: a ordem em que o usuário escolheu
+    # os países não muda o gráfico.
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return frozenset(value)
+    return value
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def result_size(value):
+    # Bytes de um resultado grande: texto (HTML/JSON) ou objeto com nbytes
+    if isinstance(value, str):
+        return len(value.encode())
+    return value.nbytes if hasattr(value, "nbytes") else len(value)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def figure_key(chart, **filters):
+    return (chart, *sorted((name, normalize(value)) for name, value in filters.items()))
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def cached_figure(chart, build, **filters):
+    # `filters` deve conter tudo de que a figura depende, inclusive a versão dos dados.
+    return get_figure_cache().get(figure_key(chart, **filters), build)
+
+# ===========================================================================================
+#                                       CACHE
+# ===========================================================================================
+
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+@st.cache_resource
+def get_large_cache():
+    return FigureCache(LARGE_CACHE_BYTES, getsizeof=result_size)
@@ -0,0 +1,202 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import numpy as np
+import pandas as pd
+
+from haversine import haversine_vector
+from scipy.spatial import cKDTree
+
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+# Células por lado de um tile de 256px do Leaflet (células de ~32px na tela).
+TILE_CELLS = 8
+
+# Zoom mais fino da hierarquia; acima dele os agrupamentos não mudam mais.
+MAX_CLUSTER_ZOOM = 16
+
+# Abaixo desta quantidade de restaurantes na área visível os pontos são enviados
+# individualmente em vez de agrupados.
+MAX_POINTS = 500
+
+WORLD_BOUNDS = (-85.0, -180.0, 85.0, 180.0)
+
+# Raio médio da Terra usado pelo pacote haversine.
+EARTH_RADIUS_KM = 6371.0088
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def mercator(lat, lon):
+    # Coordenadas Web Mercator normalizadas em [0, 1), as mesmas dos tiles do Leaflet.
+    lat = np.clip(np.asarray(lat, dtype="float64"), -85.0511, 85.0511)
+    lon = np.asarray(lon, dtype="float64")
+    x = (lon + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(np.radians(lat)) + 1.0 / np.cos(np.radians(lat))) / np.pi) / 2.0
+    return np.clip(x, 0.0, np.nextafter(1.0, 0.0)), np.clip(y, 0.0, np.nextafter(1.0, 0.0))
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def unit_vectors(lat, lon):
+    # Pontos da esfera unitária em coordenadas cartesianas.
+    lat = np.radians(np.asarray(lat, dtype="float64"))
+    lon = np.radians(np.asarray(lon, dtype="float64"))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def spread_bits(v):
+    # Intercala zeros entre os bits de v (até 32 bits), passo do código de Morton.
+    v = v.astype("uint64") & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                        (2, 0x3333333333333333), (1, 0x5555555555555555)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def morton(cx, cy):
+    return spread_bits(cx) | (spread_bits(cy) << np.uint64(1))
+
+# ===========================================================================================
+#                                       CLASSES
+# ===========================================================================================
+
+class ClusterHierarchy:
+    # Quadtree pré-calculada sobre latitude/longitude. Os pontos são ordenados pelo
+    # código de Morton da célula mais fina; assim cada célula de qualquer zoom é
+    # um intervalo contíguo dessa ordem e as células de um zoom são apenas
+    # prefixos dos códigos. Consultas devolvem só o que cai na área visível.
+
+    def __init__(self, lat, lon, rows=None):
+        lat = np.asarray(lat, dtype="float64")
+        lon = np.asarray(lon, dtype="float64")
+        rows = np.arange(len(lat)) if rows is None else np.asarray(rows)
+
+        side = 2 ** MAX_CLUSTER_ZOOM * TILE_CELLS
+        x, y = mercator(lat, lon)
+        cx, cy = (x * side).astype("uint64"), (y * side).astype("uint64")
+        codes = morton(cx, cy)
+
+        order = np.argsort(codes, kind="stable")
+        self.codes = codes[order]
+        self.cx = cx[order]
+        self.cy = cy[order]
+        self.lat = lat[order]
+        self.lon = lon[order]
+        self.rows = rows[order]
+
+        self.levels = [self._level(zoom) for zoom in range(MAX_CLUSTER_ZOOM + 1)]
+
+    def _level(self, zoom):
+        shift = MAX_CLUSTER_ZOOM - zoom
+        cells, start, count = np.unique(self.codes >> np.uint64(2 * shift),
+                                        return_index=True, return_counts=True)
+        empty = np.zeros(0)
+        return pd.DataFrame({
+            "cell": cells,
+            "cx": self.cx[start] >> np.uint64(shift),
+            "cy": self.cy[start] >> np.uint64(shift),
+            "start": start,
+            "count": count,
+            "latitude": np.add.reduceat(self.lat, start) / count if len(start) else empty,
+            "longitude": np.add.reduceat(self.lon, start) / count if len(start) else empty,
+        })
+
+    def cells(self, bounds, zoom):
+        # Células do zoom pedido que intersectam a área visível
+        # bounds = (south, west, north, east).
+        south, west, north, east = bounds
+        zoom = int(np.clip(zoom, 0, MAX_CLUSTER_ZOOM))
+        level = self.levels[zoom]
+        side = 2 ** zoom * TILE_CELLS
+        x0, y1 = mercator(south, west)
+        x1, y0 = mercator(north, east)
+        x0, x1, y0, y1 = (np.floor(v * side) for v in (x0, x1, y0, y1))
+
+        inside = level["cy"].between(y0, y1)
+        if x0 <= x1:
+            inside &= level["cx"].between(x0, x1)
+        else:
+            # Área visível cruzando o antimeridiano.
+            inside &= (level["cx"] >= x0) | (level["cx"] <= x1)
+        return level.loc[inside]
+
+    def points(self, cells, bounds):
+        # Posições, no frame original, dos restaurantes das células dentro da área visível.
+        south, west, north, east = bounds
+        if not len(cells):
+            return np.empty(0, dtype=self.rows.dtype)
+        positions = np.concatenate([np.arange(s, s + c) for s, c in zip(cells["start"], cells["count"])])
+        lat, lon = self.lat[positions], self.lon[positions]
+        visible = (lat >= south) & (lat <= north)
+        visible &= ((lon >= west) & (lon <= east)) if west <= east else ((lon >= west) | (lon <= east))
+        return self.rows[positions[visible]]
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+
+class CountryClusters:
+    # Uma hierarquia por país: a seleção do multiselect consulta só os países
+    # escolhidos e os agrupamentos que caem na mesma célula são somados.
+
+    def __init__(self, df):
+        self.hierarchies = {}
+        for country, positions in df.groupby("country", observed=True).indices.items():
+            part = df.iloc[positions]
+            self.hierarchies[country] = ClusterHierarchy(part["latitude"], part["longitude"], rows=positions)
+
+    def query(self, countries, bounds, zoom, max_points=MAX_POINTS):
+        # Devolve (agrupamentos, linhas). Se a área visível tiver até max_points
+        # restaurantes, vêm só as linhas; caso contrário, só os agrupamentos.
+        hierarchies = [self.hierarchies[c] for c in countries if c in self.hierarchies]
+        cells = [(h, h.cells(bounds, zoom)) for h in hierarchies]
+        total = sum(int(c["count"].sum()) for _, c in cells)
+
+        if total <= max_points:
+            rows = [h.points(c, bounds) for h, c in cells]
+            rows = np.sort(np.concatenate(rows)) if rows else np.empty(0, dtype="int64")
+            return pd.DataFrame(columns=["latitude", "longitude", "count"]), rows
+
+        clusters = pd.concat([c for _, c in cells])
+        clusters = clusters.assign(latitude=clusters["latitude"] * clusters["count"],
+                                   longitude=clusters["longitude"] * clusters["count"])
+        clusters = clusters.groupby("cell")[["latitude", "longitude", "count"]].sum()
+        clusters["latitude"] /= clusters["count"]
+        clusters["longitude"] /= clusters["count"]
+        return clusters.reset_index(drop=True), np.empty(0, dtype="int64")
+
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+
+class SpatialIndex:
+    # KD-tree sobre os restaurantes projetados na esfera unitária. A distância em
+    # linha reta (corda) entre dois pontos da esfera cresce junto com a distância
+    # pelo arco, então raio e vizinhos mais próximos saem direto da árvore.
+
+    def __init__(self, lat, lon):
+        self.lat = np.asarray(lat, dtype="float64")
+        self.lon = np.asarray(lon, dtype="float64")
+        self.tree = cKDTree(unit_vectors(self.lat, self.lon))
+
+    def distances(self, lat, lon, rows):
+        # Distância exata, em km, pela fórmula de haversine.
+        if not len(rows):
+            return np.empty(0)
+        points = np.column_stack([self.lat[rows], self.lon[rows]])
+        return haversine_vector(np.array([[lat, lon]]), points, comb=True)[:, 0]
+
+    def within(self, lat, lon, radius_km):
+        # (linhas, distâncias em km) dos restaurantes a até radius_km, do mais perto ao mais longe.
+        chord = 2 * np.sin(min(radius_km / EARTH_RADIUS_KM, np.pi) / 2)
+        rows = np.asarray(self.tree.query_ball_point(unit_vectors(lat, lon)[0], chord), dtype="int64")
+        distances = self.distances(lat, lon, rows)
+        order = np.lexsort((rows, distances))
+        return rows[order], distances[order]
+
+    def nearest(self, lat, lon, k):
+        # (linhas, distâncias em km) dos k restaurantes mais próximos.
+        k = min(k, len(self.lat))
+        if k == 0:
+            return np.empty(0, dtype="int64"), np.empty(0)
+        _, rows = self.tree.query(unit_vectors(lat, lon)[0], k=[*range(1, k + 1)])
+        rows = np.asarray(rows, dtype="int64")
+        distances = self.distances(lat, lon, rows)
+        order = np.lexsort((rows, distances))
+        return rows[order], distances[order]
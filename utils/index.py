@@ -0,0 +1,71 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+
+# ===========================================================================================
+#                                       CLASSES
+# ===========================================================================================
+
+class BitmapIndex:
+    # Índice de bitmaps de uma coluna categórica: para cada valor guarda um
+    # bitmap compactado (np.packbits) com as linhas onde ele aparece. Um filtro
+    # de multiselect vira um OR desses bitmaps e filtros combinados viram AND,
+    # sem comparar strings nem criar frames intermediários.
+    # Cada valor ocupa n/8 bytes, então só vale para colunas com poucos valores
+    # (country); para as demais, os valores ficam no Dataset e o filtro nas visões.
+
+    def __init__(self, series):
+        self.size = len(series)
+        # Valores na ordem em que aparecem no dataset, a mesma de series.unique().
+        self.values = pd.unique(series).tolist()
+
+        # Uma passada pela coluna (groupby), em vez de comparar cada valor com todas as linhas
+        self.bitmaps = {}
+        for value, rows in series.groupby(series, observed=True, sort=False).indices.items():
+            marked = np.zeros(self.size, dtype=bool)
+            marked[rows] = True
+            self.bitmaps[value] = np.packbits(marked)
+
+    def select(self, values):
+        empty = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        bitmaps = [self.bitmaps[v] for v in values if v in self.bitmaps]
+        return reduce(np.bitwise_or, bitmaps, empty)
+
+    def rows(self, bitmap):
+        # Posições (não rótulos) das linhas marcadas no bitmap.
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.size))
+
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+
+class RestaurantIndex:
+    # Índice hash restaurant_id -> posição da linha, para buscas em O(1). Depende
+    # da etapa de deduplicação: cada restaurant_id aparece uma única vez.
+
+    def __init__(self, series):
+        self.index = pd.Index(series.to_numpy())
+        if not self.index.is_unique:
+            raise ValueError("restaurant_id repetido; o dataset precisa passar por deduplicate()")
+
+    def __contains__(self, restaurant_id):
+        return restaurant_id in self.index
+
+    def rows(self, restaurant_ids):
+        # Posições das linhas dos ids pedidos; ids desconhecidos são ignorados.
+        positions = self.index.get_indexer(np.atleast_1d(restaurant_ids))
+        return positions[positions >= 0]
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def build_indexes(df):
+    return {
+        "country": BitmapIndex(df["country"]),
+        "restaurant_id": RestaurantIndex(df["restaurant_id"]),
+    }
@@ -0,0 +1,301 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import json
+
+import folium
+import numpy as np
+import pandas as pd
+import pydeck as pdk
+
+from branca.element import Element, Template
+from folium.plugins import MarkerCluster
+from pydeck.bindings.json_tools import default_serialize
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+# Monta um marcador por restaurante no navegador. O popup é uma função: o HTML só
+# é gerado quando o usuário clica no marcador, não para cada ponto no carregamento.
+MARKER_CALLBACK = """
+function (data, i) {
+    var icon = icons[data.color[i]] || (icons[data.color[i]] = L.AwesomeMarkers.icon({
+        icon: "home", prefix: "fa", markerColor: data.colors[data.color[i]]
+    }));
+    var marker = L.marker([data.lat[i] / 1e5, data.lon[i] / 1e5], {icon: icon});
+    marker.bindPopup(function () {
+        var html = "<p><strong>" + data.name[i] + "</strong></p>";
+        html += "<p>Price: " + data.cost[i] + ",00 (" + data.currencies[data.currency[i]] + ") para dois";
+        html += "<br />Type: " + data.cuisines[data.cuisine[i]];
+        html += "<br />Aggragate Rating: " + (data.rating[i] / 10).toFixed(1) + "/5.0";
+        return html;
+    }, {maxWidth: 500});
+    return marker;
+}
+"""
+
+# Cores dos marcadores do folium (AwesomeMarkers) em RGB, para o mapa WebGL usar
+# a mesma legenda de notas
+COLOR_RGB = {
+    "darkgreen": (114, 130, 36),
+    "green": (114, 176, 38),
+    "lightgreen": (187, 249, 112),
+    "orange": (246, 151, 48),
+    "red": (214, 62, 42),
+    "darkred": (162, 51, 54),
+}
+
+DECK_TOOLTIP = {
+    "html": "<b>{nome}</b><br/>"
+            "Price: {custo},00 ({moeda}) para dois<br/>"
+            "Aggragate Rating: {nota}/5.0",
+}
+HEXAGON_TOOLTIP = {"html": "{elevationValue} restaurantes<br/>Nota média: {colorValue}"}
+
+# Colunas que os marcadores e popups usam: os filtros do mapa copiam só estas
+MAP_COLUMNS = ["restaurant_name", "latitude", "longitude", "average_cost_for_two", "currency", "cuisines",
+               "aggregate_rating", "color_name"]
+
+# ===========================================================================================
+#                                       CLASSES
+# ===========================================================================================
+
+class RawScript(Element):
+    # Trecho de script inserido sem passar pelo Jinja: o folium recompila como
+    # template todo script filho da figura, o que com megabytes de JSON domina
+    # o tempo de geração do HTML.
+
+    def __init__(self, text):
+        super().__init__()
+        self.text = text
+
+    def render(self, **kwargs):
+        return self.text
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+
+class CompactDeck(pdk.Deck):
+    # O pydeck gera o JSON indentado, e cada ponto vira um objeto com as chaves
+    # repetidas; sem a indentação a especificação enviada ao navegador cai pela metade.
+    # O mapa não muda depois de montado, então o JSON é gerado uma única vez e
+    # reaproveitado quando a mesma instância é desenhada de novo (cache de figuras).
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._spec = None
+
+    def to_json(self):
+        if self._spec is None:
+            # Atributos None ficam fora do JSON, então _spec não aparece na especificação
+            self._spec = json.dumps(self, sort_keys=True, default=default_serialize, separators=(",", ":"))
+        return self._spec
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+
+class DeckSpec:
+    # O que o st.pydeck_chart lê de um Deck (o JSON e o tooltip), sem os frames
+    # das camadas: é isto que vai para o cache, limitado pelo tamanho do JSON.
+    def __init__(self, deck):
+        self.spec = deck.to_json()
+        self._tooltip = deck._tooltip
+        self.nbytes = len(self.spec.encode())
+
+    def to_json(self):
+        return self.spec
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+
+class BulkMarkerCluster(MarkerCluster):
+    # Variante do FastMarkerCluster que recebe os dados em colunas (uma lista por
+    # atributo, com as colunas categóricas como códigos + dicionário) e adiciona
+    # todos os marcadores ao cluster de uma vez com addLayers.
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var icons = {};
+                var callback = {{ this.callback }};
+                var data = {{ this.get_name() }}_data;
+                var markers = new Array(data.lat.length);
+                for (var i = 0; i < data.lat.length; i++) {
+                    markers[i] = callback(data, i);
+                }
+                var cluster = L.markerClusterGroup({{ this.options|tojson }});
+                cluster.addLayers(markers);
+                cluster.addTo({{ this._parent.get_name() }});
+                return cluster;
+            })();
+        {% endmacro %}"""
+    )
+
+    def __init__(self, data, callback=MARKER_CALLBACK, **kwargs):
+        kwargs.setdefault("chunked_loading", True)
+        super().__init__(**kwargs)
+        self._name = "BulkMarkerCluster"
+        self.callback = callback.strip()
+        # Serializado de uma vez com json.dumps; os escapes impedem que um nome
+        # feche a tag <script>.
+        self.data_json = (json.dumps(data)
+                              .replace("<", "\\u003c")
+                              .replace(">", "\\u003e")
+                              .replace("&", "\\u0026"))
+
+    def render(self, **kwargs):
+        data = RawScript(f"var {self.get_name()}_data = {self.data_json};")
+        self.get_root().script.add_child(data, name=f"{self.get_name()}_data")
+        super().render(**kwargs)
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def encode_column(series):
+    # Coluna categórica -> (lista de categorias, lista de códigos por linha).
+    categorical = pd.Categorical(series)
+    return categorical.categories.astype(str).tolist(), categorical.codes.tolist()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def fixed_point(series, scale):
+    return np.round(series.to_numpy(dtype="float64") * scale).astype("int64").tolist()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def marker_data(dataframe):
+    # Dados dos marcadores em colunas, montados em uma única passada vetorizada.
+    # Coordenadas vão em inteiros de 1e-5 grau (~1 m) e notas em décimos: inteiros
+    # deixam o JSON menor e mais rápido de gerar do que floats.
+    colors, color = encode_column(dataframe["color_name"])
+    currencies, currency = encode_column(dataframe["currency"])
+    cuisines, cuisine = encode_column(dataframe["cuisines"])
+    return {
+        "lat": fixed_point(dataframe["latitude"], 1e5),
+        "lon": fixed_point(dataframe["longitude"], 1e5),
+        "name": dataframe["restaurant_name"].astype(str).tolist(),
+        "cost": dataframe["average_cost_for_two"].tolist(),
+        "rating": fixed_point(dataframe["aggregate_rating"], 10),
+        "colors": colors,
+        "color": color,
+        "currencies": currencies,
+        "currency": currency,
+        "cuisines": cuisines,
+        "cuisine": cuisine,
+    }
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def build_map(dataframe):
+    f = folium.Figure(width=1920, height=1080)
+
+    m = folium.Map(max_bounds=True).add_to(f)
+
+    BulkMarkerCluster(marker_data(dataframe)).add_to(m)
+
+    return m
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def map_html(m):
+    # O HTML do mapa `m` (o mesmo que o folium_static geraria), para guardar em
+    # cache e exibir com components.html
+    return folium.Figure().add_child(m).render()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def popup_html(line):
+    html = "<p><strong>{}</strong></p>"
+    html += "<p>Price: {},00 ({}) para dois"
+    html += "<br />Type: {}"
+    html += "<br />Aggragate Rating: {}/5.0"
+    return html.format(line["restaurant_name"], line["average_cost_for_two"], line["currency"],
+                       line["cuisines"], line["aggregate_rating"])
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def viewport_layer(clusters, points):
+    # Camada com o que o servidor decidiu enviar para a área visível: círculos com
+    # a contagem de cada agrupamento ou, com poucos restaurantes, os próprios pontos.
+    layer = folium.FeatureGroup(name="Restaurantes")
+
+    for lat, lon, count in clusters[["latitude", "longitude", "count"]].itertuples(index=False):
+        folium.CircleMarker(
+            [lat, lon],
+            radius=8 + 4 * np.log10(count),
+            color="#3186cc",
+            fill=True,
+            fill_opacity=0.6,
+            tooltip=f"{count} restaurantes",
+        ).add_to(layer)
+
+    for line in points.to_dict("records"):
+        folium.CircleMarker(
+            [line["latitude"], line["longitude"]],
+            radius=6,
+            color=line["color_name"],
+            fill=True,
+            fill_opacity=0.9,
+            popup=folium.Popup(popup_html(line), max_width=500),
+        ).add_to(layer)
+
+    return layer
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def deck_data(dataframe):
+    # Só as colunas usadas pela camada e pelo tooltip, com nomes curtos porque
+    # cada ponto repete as chaves no JSON. A cor vai em três colunas inteiras,
+    # combinadas no navegador pela expressão "[r, g, b]".
+    colors, codes = encode_column(dataframe["color_name"])
+    rgb = np.array([COLOR_RGB[c] for c in colors], dtype="int64").reshape(-1, 3)[codes]
+    return pd.DataFrame({
+        "lon": dataframe["longitude"].to_numpy(dtype="float64").round(5),
+        "lat": dataframe["latitude"].to_numpy(dtype="float64").round(5),
+        "nome": dataframe["restaurant_name"].astype(str).to_numpy(),
+        "custo": dataframe["average_cost_for_two"].to_numpy(dtype="int64"),
+        "moeda": dataframe["currency"].astype(str).to_numpy(),
+        "nota": dataframe["aggregate_rating"].to_numpy(dtype="float64"),
+        "r": rgb[:, 0],
+        "g": rgb[:, 1],
+        "b": rgb[:, 2],
+    })
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def deck_view(data):
+    # Enquadra 90% dos pontos (ignora os extremos). Mesma ideia do
+    # pdk.data_utils.compute_view, que percorre os pontos em Python.
+    if not len(data):
+        return pdk.ViewState(latitude=0, longitude=0, zoom=1)
+    lon_min, lon_max = np.quantile(data["lon"], [0.05, 0.95])
+    lat_min, lat_max = np.quantile(data["lat"], [0.05, 0.95])
+    span = max(lon_max - lon_min, (lat_max - lat_min) * 2, 0.01)
+    zoom = float(np.clip(np.log2(360 / span), 1, 12))
+    return pdk.ViewState(latitude=(lat_min + lat_max) / 2, longitude=(lon_min + lon_max) / 2, zoom=zoom)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def build_deck(dataframe, layer="Pontos"):
+    return deck_from_data(deck_data(dataframe), layer)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def deck_from_data(data, layer="Pontos"):
+    # Mapa desenhado pela GPU (deck.gl): os restaurantes são uma única camada em
+    # vez de um elemento por marcador, então o mapa continua fluido com centenas
+    # de milhares de pontos. `data` é a saída do deck_data (ou a pré-calculada por país).
+    if layer == "Hexágonos":
+        # Hexágonos com altura pela quantidade de restaurantes e cor pela nota média,
+        # na mesma escala de cores dos pontos (de darkred a darkgreen).
+        deck_layer = pdk.Layer(
+            "HexagonLayer",
+            data[["lon", "lat", "nota"]],
+            get_position="[lon, lat]",
+            get_color_weight="nota",
+            color_aggregation=pdk.types.String("MEAN"),
+            color_range=[COLOR_RGB[c] for c in ["darkred", "red", "orange", "lightgreen", "green", "darkgreen"]],
+            radius=2000,
+            elevation_scale=50,
+            extruded=True,
+            pickable=True,
+            id="restaurantes",
+        )
+        tooltip = HEXAGON_TOOLTIP
+    else:
+        deck_layer = pdk.Layer(
+            "ScatterplotLayer",
+            data,
+            get_position="[lon, lat]",
+            get_fill_color="[r, g, b]",
+            get_radius=60,
+            radius_min_pixels=2,
+            radius_max_pixels=10,
+            pickable=True,
+            id="restaurantes",
+        )
+        tooltip = DECK_TOOLTIP
+
+    return CompactDeck(
+        layers=[deck_layer],
+        initial_view_state=deck_view(data),
+        map_provider="carto",
+        map_style=pdk.map_styles.CARTO_LIGHT,
+        tooltip=tooltip,
+    )
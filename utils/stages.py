@@ -0,0 +1,50 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import streamlit as st
+
+from utils.figures import figure_key, get_figure_cache, get_large_cache
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+# st.fragment (Streamlit 1.37, a versão do requirements.txt): a função decorada
+# reroda sozinha quando um widget de dentro dela muda. Com versões anteriores
+# (st.experimental_fragment entre a 1.33 e a 1.36; nada antes disso) a página
+# inteira reroda, e as etapas em cache evitam o recálculo.
+FRAGMENT = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+# ===========================================================================================
+#                                       CLASSES
+# ===========================================================================================
+
+class DependencyGraph:
+    # Grafo entre as entradas de uma página (widgets e versão dos dados) e as
+    # suas seções: cada seção declara de quais entradas depende, e o resultado
+    # dela fica no cache compartilhado com a chave formada só por essas entradas.
+    # Mudar um widget recalcula apenas as seções que dependem dele; as demais
+    # saem prontas do cache no rerun.
+    # As seções em `large` (mapas, por exemplo) vão para o cache limitado por bytes.
+    def __init__(self, page, sections, large=()):
+        self.page = page
+        self.sections = sections
+        self.large = set(large)
+
+    def inputs(self, section, values):
+        return {name: values[name] for name in self.sections[section]}
+
+    def stage(self, section, build, **values):
+        # `values` pode trazer todas as entradas da página; só as da seção entram na chave
+        key = figure_key(f"{self.page}:{section}", **self.inputs(section, values))
+        cache = get_large_cache() if section in self.large else get_figure_cache()
+        return cache.get(key, build)
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def isolated(func):
+    # Seção com widgets próprios, rerodada sozinha quando o Streamlit tem fragmentos
+    return FRAGMENT(func) if FRAGMENT is not None else func
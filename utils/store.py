@@ -0,0 +1,310 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+from utils import arrow_query
+from utils.cube import build_cube, cube_is_fresh, merge_cubes, read_cube
+from utils.data import (COLUMNS_ORDER, DATASET_PATH, QUERY_BACKEND, SERVING_COLUMNS, compact_dtypes, data_file, dataset_version,
+                        load_data, load_dataset, read_columns, read_snapshot)
+from utils.geo import CountryClusters, SpatialIndex
+from utils.index import build_indexes
+from utils.timing import span
+from utils.views import load_cached_views, precompute_views, read_views, store_cached_views, views_are_fresh
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+# CSVs com as mesmas colunas do zomato.csv colocados aqui são incorporados aos
+# dados em segundo plano, em ordem de nome. O arquivo deve aparecer já completo
+# (escreva com outra extensão e renomeie para .csv no final).
+DELTA_DIR = DATASET_PATH.parent / "deltas"
+REFRESH_INTERVAL = float(os.environ.get("FOME_ZERO_REFRESH_INTERVAL", "30"))
+# Nome dos threads que consultam os deltas (DatasetStore.watch)
+WATCH_THREAD = "fome-zero-refresh"
+
+# O cubo sai igual nos dois backends; no arrow o groupby roda no pyarrow.compute
+CUBE_BUILDER = arrow_query.build_cube if QUERY_BACKEND == "arrow" else build_cube
+
+logger = logging.getLogger(__name__)
+
+# ===========================================================================================
+#                                       CLASSES
+# ===========================================================================================
+
+class ColdColumns:
+    # Colunas fora do frame do servidor (as que só o export usa), numa tabela
+    # Arrow lida do arquivo já tratado; `positions` leva cada linha do frame à
+    # sua linha na tabela. Os deltas acrescentam blocos à tabela sem copiá-la.
+    def __init__(self, table, positions=None):
+        self.table = table
+        self.positions = np.arange(table.num_rows) if positions is None else positions
+
+    def take(self, rows):
+        return compact_dtypes(self.table.take(self.positions[rows]).to_pandas())
+
+    def append(self, kept, delta):
+        # Linhas `kept` da versão atual seguidas das linhas de `delta`
+        table = pa.Table.from_pandas(delta[self.table.column_names], schema=self.table.schema, preserve_index=False)
+        positions = np.concatenate([self.positions[kept], self.table.num_rows + np.arange(len(delta))])
+        return ColdColumns(pa.concat_tables([self.table, table]), positions)
+
+
+class Dataset:
+    # Uma versão imutável dos dados tratados e das estruturas derivadas dela
+    # (cubo, índices, agrupamentos do mapa), construídas na primeira vez que
+    # alguém as pede. Cada rerun pega a versão atual uma única vez e usa só ela.
+    def __init__(self, df, version, derived=None, cold=None):
+        self.df = df
+        self.version = version
+        self.cold = cold
+        self._derived = dict(derived or {})
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name, build):
+        if name in self._derived:
+            return self._derived[name]
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._derived:
+                self._derived[name] = build(self.df)
+            return self._derived[name]
+
+    def frame(self):
+        # Cópia rasa: as páginas podem reatribuir colunas sem tocar no frame compartilhado.
+        return self.df.copy(deep=False)
+
+    def take_all(self, rows):
+        # Linhas (posições) com todas as colunas do dataset, inclusive as de `cold` (export)
+        frame = self.df.take(rows)
+        if self.cold is None:
+            return frame
+        cold = self.cold.take(rows).set_axis(frame.index)
+        return pd.concat([frame, cold], axis=1)[[c for c in COLUMNS_ORDER if c in frame or c in cold]]
+
+    @property
+    def cube(self):
+        return self._get("cube", CUBE_BUILDER)
+
+    @property
+    def table(self):
+        # Colunas das consultas em uma tabela Arrow (backend arrow)
+        return self._get("table", arrow_query.to_table)
+
+    @property
+    def query_cube(self):
+        # Cubo no formato do backend configurado: DataFrame (pandas) ou tabela Arrow (arrow)
+        if QUERY_BACKEND != "arrow":
+            return self.cube
+        return self._get("query_cube", lambda df: arrow_query.cube_table(self.cube))
+
+    @property
+    def indexes(self):
+        return self._get("indexes", build_indexes)
+
+    @property
+    def cuisines(self):
+        # Opções do filtro de culinária, na ordem em que aparecem no dataset
+        return self._get("cuisines", lambda df: pd.unique(df["cuisines"]).tolist())
+
+    @property
+    def country_clusters(self):
+        return self._get("country_clusters", CountryClusters)
+
+    @property
+    def spatial_index(self):
+        return self._get("spatial_index", lambda df: SpatialIndex(df["latitude"], df["longitude"]))
+
+    @property
+    def views(self):
+        return self._get("views", precompute_views)
+
+
+class DatasetStore:
+    # Guarda a versão atual e a substitui quando chegam deltas. A nova versão é
+    # montada inteira em segundo plano e publicada com uma única atribuição, então
+    # um rerun em andamento continua com a versão que pegou e nunca espera a carga.
+    def __init__(self, delta_dir=DELTA_DIR):
+        self.delta_dir = Path(delta_dir)
+        self.applied = set()
+        # Arquivos que falharam na limpeza, com o mtime da tentativa; só são lidos
+        # de novo se forem substituídos.
+        self.rejected = {}
+        self.stopped = threading.Event()
+        version = dataset_version()
+        derived = {}
+        # Cubo e visões gravados pelo ETL; ilegíveis (ex.: outro usuário sem
+        # permissão de leitura), eles são recalculados a partir do frame
+        cube = read_derived("cubo", read_cube) if cube_is_fresh() else None
+        if cube is not None:
+            derived["cube"] = cube
+        views = read_derived("visões por país", read_views) if views_are_fresh() else None
+        if views is None:
+            views = load_cached_views(version)
+        if views is not None:
+            derived["views"] = views
+        df, cold = load_serving()
+        self.current = Dataset(df, version, derived, cold)
+        self.base_version = version
+        self.refresh()
+
+    def pending(self):
+        if not self.delta_dir.is_dir():
+            return []
+        return sorted(p for p in self.delta_dir.glob("*.csv")
+                      if p.name not in self.applied and self.rejected.get(p.name) != p.stat().st_mtime_ns)
+
+    def refresh(self):
+        paths, frames = [], []
+        for path in self.pending():
+            try:
+                frames.append(load_dataset(path))
+                paths.append(path)
+            except Exception:
+                # Um delta inválido não derruba o app nem impede os demais
+                logger.exception("Delta ignorado: %s", path)
+                self.rejected[path.name] = path.stat().st_mtime_ns
+        if not paths:
+            return False
+        dataset = apply_deltas(self.current, paths, frames)
+        self.applied.update(p.name for p in paths)
+        self.current = dataset
+        logger.info("Dados atualizados para a versão %s com %d delta(s)", dataset.version, len(paths))
+        return True
+
+    def watch(self, interval=REFRESH_INTERVAL):
+        thread = threading.Thread(target=self._watch, args=(interval,), name=WATCH_THREAD, daemon=True)
+        thread.store = self
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.stopped.set()
+
+    def _watch(self, interval):
+        # As visões por país que não vieram do disco são calculadas aqui, fora dos
+        # reruns. Sem deltas aplicados elas valem para o próximo início e são gravadas.
+        dataset = self.current
+        if "views" not in dataset._derived:
+            try:
+                views = dataset.views
+                if dataset.version == self.base_version:
+                    store_cached_views(views, dataset.version)
+            except Exception:
+                logger.exception("Falha no pré-cálculo das visões por país")
+        while not self.stopped.wait(interval):
+            try:
+                self.refresh()
+            except Exception:
+                # A versão atual continua no ar
+                logger.exception("Falha ao incorporar os deltas de %s", self.delta_dir)
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def load_serving():
+    # O frame do servidor só com as SERVING_COLUMNS; as demais colunas ficam no
+    # arquivo já tratado (snapshot ou cache da limpeza) e são lidas no export.
+    path = data_file()
+    if path is None:
+        # Primeira limpeza do CSV: o frame inteiro passa pela memória uma vez
+        full = load_data()
+        path = data_file()
+        df = full[SERVING_COLUMNS].copy()
+        if path is None:
+            # Sem o cache em disco (ex.: sem permissão de escrita), a tabela fica na memória
+            table = pa.Table.from_pandas(full.drop(columns=SERVING_COLUMNS), preserve_index=False)
+            return df, ColdColumns(table)
+    else:
+        with span("read_snapshot"):
+            df = read_snapshot(path, SERVING_COLUMNS)
+    return df, ColdColumns(read_columns(path, [c for c in COLUMNS_ORDER if c not in SERVING_COLUMNS]))
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def read_derived(name, read):
+    try:
+        return read()
+    except (OSError, ValueError):
+        logger.exception("Não foi possível ler %s do disco; será recalculado", name)
+        return None
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def delta_version(version, paths):
+    key = "|".join([version, *(f"{p.name}:{p.stat().st_size}:{p.stat().st_mtime_ns}" for p in paths)])
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def apply_deltas(dataset, paths, frames=None):
+    # Os deltas passam pela mesma limpeza do CSV principal. Um restaurant_id que já
+    # existe é substituído pela linha mais recente (o último arquivo vence).
+    frames = frames or [load_dataset(p) for p in paths]
+    delta = pd.concat(frames)
+    repeated = delta["restaurant_id"].duplicated(keep="last")
+    delta = delta.loc[~repeated]
+
+    old = dataset.df
+    replaced = old["restaurant_id"].isin(delta["restaurant_id"]).to_numpy()
+    # Novas linhas continuam a numeração do frame atual
+    start = old.index.max() + 1 if len(old) else 0
+    delta.index = pd.RangeIndex(start, start + len(delta))
+    df = compact_dtypes(pd.concat([old.loc[~replaced], delta[old.columns]]))
+    cold = dataset.cold.append(np.flatnonzero(~replaced), delta) if dataset.cold is not None else None
+    # Duplicados descartados: os da versão atual, os da limpeza de cada delta e
+    # os repetidos entre deltas. Linhas substituídas por um delta não contam.
+    duplicates = old.attrs.get("duplicates", 0) + sum(f.attrs.get("duplicates", 0) for f in frames)
+    df.attrs = {"duplicates": duplicates + int(repeated.sum())}
+
+    # Só as cidades com linhas removidas ou incluídas têm o cubo recalculado
+    affected = pd.MultiIndex.from_frame(
+        pd.concat([old.loc[replaced, ["country", "city"]], delta[["country", "city"]]]).astype(str))
+    cube = dataset.cube
+    cities = cube.index.droplevel(["cuisines", "price_type"])
+    kept = cube.loc[~cities.isin(affected)]
+    df_cities = pd.MultiIndex.from_frame(df[["country", "city"]].astype(str))
+    cube = merge_cubes(kept, CUBE_BUILDER(df.loc[df_cities.isin(affected)]))
+
+    derived = {"cube": cube}
+    if "views" in dataset._derived:
+        # Só os países afetados têm as visões recalculadas
+        derived["views"] = dataset.views.update(df, affected.get_level_values("country").unique())
+    updated = Dataset(df, delta_version(dataset.version, paths), derived, cold)
+    # Estruturas que a versão anterior já tinha são montadas agora, fora dos reruns
+    for name in dataset._derived:
+        getattr(updated, name)
+    return updated
+
+# ===========================================================================================
+#                                       CACHE
+# ===========================================================================================
+
+@st.cache_resource(show_spinner="Carregando os dados...")
+def get_store():
+    store = DatasetStore()
+    # O cache_resource não avisa quando descarta um store (cache limpo, módulo
+    # recarregado): os watchers anteriores são parados aqui, antes do novo
+    stop_watchers()
+    store.watch()
+    return store
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def stop_watchers():
+    # Procura pelos threads, e não por uma variável do módulo, que o Streamlit
+    # recria ao recarregar o módulo
+    for thread in threading.enumerate():
+        store = getattr(thread, "store", None)
+        if thread.name == WATCH_THREAD and store is not None:
+            store.stop()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def current_dataset():
+    # Versão publicada no momento; chame uma vez por rerun e use o objeto retornado.
+    return get_store().current
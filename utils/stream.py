@@ -0,0 +1,188 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.cube import CUBE_PATH, build_cube, merge_cubes, write_cube
+from utils.data import (CATEGORY_COLUMNS, CLEANING_VERSION_KEY, COUNTRIES, DATASET_PATH, NUMERIC_DTYPES,
+                        SNAPSHOT_PATH, adjust_columns_order, clean_code, cleaning_version, compact_dtypes,
+                        rename_columns)
+from utils.views import merge_views, precompute_views, sort_view
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+# Linhas do CSV lidas por vez. A memória usada na ingestão depende deste valor e
+# da quantidade de valores distintos, não do tamanho do arquivo.
+STREAM_CHUNK_ROWS = 200_000
+
+# Os países vêm da tabela COUNTRIES, então todos os blocos dos pontos do mapa
+# pydeck usam o mesmo dicionário
+COUNTRY_DTYPE = pd.CategoricalDtype(sorted(COUNTRIES.values()))
+
+# ===========================================================================================
+#                                       CLASSES
+# ===========================================================================================
+
+class SeenIds:
+    # Conjunto de restaurant_id já gravados, um bit por id (np.packbits, como o
+    # BitmapIndex): 10 milhões de ids ocupam pouco mais de 1 MB.
+    def __init__(self):
+        self.bits = np.zeros(0, dtype=np.uint8)
+
+    def first_seen(self, ids):
+        # Máscara das linhas cujo id ainda não apareceu, nem antes nem no próprio
+        # bloco (mantém a primeira ocorrência, como o deduplicate).
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) and ids.min() < 0:
+            raise ValueError("restaurant_id negativo não pode ser indexado")
+        byte, bit = ids >> 3, (ids & 7).astype(np.uint8)
+
+        size = int(byte.max()) + 1 if len(ids) else 0
+        if size > len(self.bits):
+            grown = np.zeros(max(size, 2 * len(self.bits)), dtype=np.uint8)
+            grown[:len(self.bits)] = self.bits
+            self.bits = grown
+
+        new = ~pd.Series(ids).duplicated(keep="first").to_numpy()
+        new &= (self.bits[byte] >> bit) & 1 == 0
+        np.bitwise_or.at(self.bits, byte[new], np.left_shift(1, bit[new]).astype(np.uint8))
+        return new
+
+
+class CategoryEncoder:
+    # Categorias acumuladas entre os blocos. Cada bloco é codificado com a lista
+    # completa até ali, então o dicionário do Arrow só cresce (dictionary deltas)
+    # e os códigos de blocos anteriores continuam válidos.
+    def __init__(self):
+        self.categories = {col: pd.Index([], dtype=object) for col in CATEGORY_COLUMNS}
+
+    def encode(self, df):
+        dtypes = {col: dtype for col, dtype in NUMERIC_DTYPES.items() if col in df.columns}
+        df = df.astype(dtypes)
+        for col, categories in self.categories.items():
+            values = pd.Index(df[col].unique())
+            self.categories[col] = categories.append(values.difference(categories, sort=False))
+            df[col] = pd.Categorical(df[col], categories=self.categories[col])
+        return df
+
+
+class StreamViews:
+    # Visões por país montadas bloco a bloco, sem carregar o snapshot: "top" e
+    # "ratings" se combinam entre blocos (merge_views) e ficam do tamanho do top
+    # de cada (país, culinária); "deck" tem um ponto por restaurante e vai direto
+    # para o arquivo, um row group por bloco.
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.deck_tmp = self.path / "deck.tmp.parquet"
+        self.views = None
+        self.writer = None
+
+    def add(self, df):
+        parts = precompute_views(df, workers=1).views
+        deck = parts.pop("deck").astype({"country": COUNTRY_DTYPE})
+        if self.writer is None:
+            self.schema = pa.Schema.from_pandas(deck, preserve_index=True)
+            self.writer = pq.ParquetWriter(self.deck_tmp, self.schema)
+        self.writer.write_table(pa.Table.from_pandas(deck, schema=self.schema, preserve_index=True))
+        self.views = parts if self.views is None else merge_views(self.views, parts)
+
+    def finish(self):
+        # Chamado depois que o snapshot foi publicado: as visões ficam mais novas que ele
+        self.writer, writer = None, self.writer
+        writer.close()
+        os.replace(self.deck_tmp, self.path / "deck.parquet")
+        for name, frame in self.views.items():
+            # Categorias em ordem alfabética, como as das visões do dataset inteiro
+            frame = sort_view(name, compact_dtypes(frame))
+            tmp = self.path / f"{name}.tmp.parquet"
+            frame.to_parquet(tmp)
+            os.replace(tmp, self.path / f"{name}.parquet")
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.deck_tmp.unlink(missing_ok=True)
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def iter_clean_chunks(path=DATASET_PATH, chunk_rows=STREAM_CHUNK_ROWS):
+    # Mesmas regras do load_dataset, aplicadas a um bloco do CSV de cada vez. O
+    # índice dos blocos continua a numeração das linhas do arquivo inteiro.
+    for df in pd.read_csv(path, chunksize=chunk_rows):
+        df = rename_columns(df)
+        df = clean_code(df)
+        yield adjust_columns_order(df)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def stream_schema(df):
+    # Índices de dicionário em int32: o primeiro bloco não diz quantas categorias
+    # virão, e o tipo do schema não pode mudar no meio do arquivo.
+    schema = pa.Schema.from_pandas(df, preserve_index=True)
+    for col in CATEGORY_COLUMNS:
+        i = schema.get_field_index(col)
+        schema = schema.set(i, schema.field(i).with_type(pa.dictionary(pa.int32(), pa.string())))
+    return schema.with_metadata({**(schema.metadata or {}), CLEANING_VERSION_KEY: cleaning_version().encode()})
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def open_writer(path, schema):
+    if Path(path).suffix == ".parquet":
+        return pq.ParquetWriter(path, schema)
+    options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+    return pa.ipc.new_file(str(path), schema, options=options)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def stream_ingest(csv=DATASET_PATH, out=SNAPSHOT_PATH, cube_path=CUBE_PATH, chunk_rows=STREAM_CHUNK_ROWS,
+                  views_path=None):
+    # Lê o CSV em blocos e, para cada um, limpa, remove ids já vistos, grava as
+    # linhas no snapshot e soma o bloco ao cubo de agregados (e às visões por
+    # país, com views_path). O snapshot é escrito num arquivo temporário e só
+    # substitui o anterior quando estiver completo.
+    out = Path(out)
+    tmp = out.with_suffix(".tmp" + out.suffix)
+    seen, encoder = SeenIds(), CategoryEncoder()
+    views = StreamViews(views_path) if views_path is not None else None
+    writer, cube = None, None
+    stats = {"chunks": 0, "rows": 0, "duplicates": 0}
+
+    try:
+        for df in iter_clean_chunks(csv, chunk_rows):
+            new = seen.first_seen(df["restaurant_id"])
+            stats["duplicates"] += int((~new).sum())
+            df = encoder.encode(df.loc[new])
+
+            if writer is None:
+                schema = stream_schema(df)
+                writer = open_writer(tmp, schema)
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=True))
+            part = build_cube(df)
+            cube = part if cube is None else merge_cubes(cube, part)
+            if views is not None:
+                views.add(df)
+
+            stats["chunks"] += 1
+            stats["rows"] += len(df)
+        if writer is None:
+            raise ValueError(f"{csv} não tem linhas")
+        writer, finished = None, writer
+        finished.close()
+        os.replace(tmp, out)
+        if views is not None:
+            views.finish()
+    finally:
+        if writer is not None:
+            writer.close()
+        if views is not None:
+            views.close()
+        tmp.unlink(missing_ok=True)
+
+    write_cube(merge_cubes(cube), {"duplicates": stats["duplicates"]}, cube_path)
+    return stats
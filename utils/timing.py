@@ -0,0 +1,115 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import contextvars
+import datetime
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+# FOME_ZERO_TIMING=1 mede todas as sessões; sem ela, só as abertas com ?debug=1
+TIMING_ENABLED = os.environ.get("FOME_ZERO_TIMING", "0") == "1"
+TIMING_LOG = Path(os.environ.get("FOME_ZERO_TIMING_LOG",
+                                 Path(__file__).resolve().parent.parent / ".cache" / "timing.jsonl"))
+
+# Cronômetro do rerun em andamento. O Streamlit roda cada sessão na sua própria
+# thread, e as funções em cache rodam na thread de quem pediu, então etapas
+# internas (ex.: a leitura do CSV) entram no rerun que as disparou.
+_current_timer = contextvars.ContextVar("fome_zero_timer", default=None)
+_log_lock = threading.Lock()
+_no_span = nullcontext()
+
+# ===========================================================================================
+#                                       CLASSES
+# ===========================================================================================
+
+class RerunTimer:
+    def __init__(self, page):
+        self.page = page
+        self.spans = []
+        self.depth = 0
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def span(self, name):
+        record = {"name": name, "depth": self.depth}
+        self.spans.append(record)
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record["ms"] = round((time.perf_counter() - start) * 1000, 3)
+            self.depth -= 1
+
+    def record(self, filters, counters):
+        ctx = get_script_run_ctx()
+        return {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "session": ctx.session_id if ctx else None,
+            "page": self.page,
+            "filters": filters,
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "spans": self.spans,
+            **counters,
+        }
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def timing_enabled():
+    return TIMING_ENABLED or st.query_params.get("debug") == "1"
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def start_timer(page):
+    # Chamado no início de cada script; desligado, nenhuma etapa é medida.
+    _current_timer.set(RerunTimer(page) if timing_enabled() else None)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def span(name):
+    timer = _current_timer.get()
+    return _no_span if timer is None else timer.span(name)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def append_log(record, path=TIMING_LOG):
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _log_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as log:
+            log.write(line + "\n")
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def show_panel(record, counters):
+    with st.sidebar.expander("⏱️ Tempos desta execução"):
+        st.caption(f"Total: {record['total_ms']:.1f} ms")
+        for name, values in counters.items():
+            st.caption(f"{name}: " + ", ".join(f"{k} {v}" for k, v in values.items()))
+        st.dataframe(
+            pd.DataFrame({
+                "etapa": [" " * s["depth"] + s["name"] for s in record["spans"]],
+                "ms": [s["ms"] for s in record["spans"]],
+            }),
+            hide_index=True,
+            use_container_width=True,
+        )
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def finish_timer(filters, **counters):
+    # Chamado no fim de cada script com a seleção de filtros do rerun e, se houver,
+    # contadores do processo (ex.: acertos do cache de figuras) para o log.
+    timer = _current_timer.get()
+    if timer is None:
+        return
+    _current_timer.set(None)
+
+    record = timer.record(filters, counters)
+    append_log(record)
+    show_panel(record, counters)
@@ -0,0 +1,52 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import numpy as np
+import pandas as pd
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def tie_key(series):
+    # Colunas categóricas desempatam pelos códigos (categorias em ordem alfabética).
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy()
+    return series.to_numpy()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def top_k_positions(values, ties, k, ascending=False):
+    # Posições dos k melhores valores, em ordem, desempatando pelo menor `ties`.
+    # Seleção parcial (np.partition) em O(n): só os candidatos que empatam ou
+    # superam o k-ésimo valor são ordenados, não o array inteiro.
+    key = np.asarray(values, dtype="float64")
+    key = key if ascending else -key
+    k = min(k, len(key))
+    if k <= 0:
+        return np.empty(0, dtype="int64")
+
+    kth = np.partition(key, k - 1)[k - 1]
+    candidates = np.flatnonzero(key <= kth)
+    order = np.lexsort((np.asarray(ties)[candidates], key[candidates]))
+    return candidates[order[:k]]
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def top_k(df, k, by, tie, ascending=False):
+    # Equivalente a df.sort_values([by, tie], ascending=[ascending, True]).head(k).
+    return df.take(top_k_positions(df[by].to_numpy(), tie_key(df[tie]), k, ascending))
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def group_top_k(df, group, k, by, tie, ascending=False):
+    # Os k melhores de cada grupo (ex.: melhor restaurante por culinária). As
+    # linhas são separadas por grupo com um argsort estável sobre os códigos da
+    # categoria (radix sort para inteiros pequenos) e cada grupo usa top_k_positions.
+    codes = pd.Categorical(df[group]).codes
+    order = np.argsort(codes, kind="stable")
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+
+    values = df[by].to_numpy()
+    ties = tie_key(df[tie])
+    positions = []
+    for rows in np.split(order, bounds) if len(order) else []:
+        positions.append(rows[top_k_positions(values[rows], ties[rows], k, ascending)])
+
+    positions = np.concatenate(positions) if positions else np.empty(0, dtype="int64")
+    return df.take(positions)
@@ -0,0 +1,222 @@
+# ===========================================================================================
+#                                       BIBLIOTECA
+# ===========================================================================================
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.data import (CLEAN_CACHE_DIR, DATA_SOURCE, SNAPSHOT_PATH, cleaning_version, publish_file,
+                        snapshot_is_current, snapshot_is_fresh)
+from utils.maps import deck_data
+from utils.topk import group_top_k
+
+# ===========================================================================================
+#                                       VARIÁVEIS
+# ===========================================================================================
+
+# Visões pré-calculadas por país: o filtro de países tem só 15 opções, então tudo
+# o que as páginas montam para uma seleção sai da junção das partes dos países
+# escolhidos, calculadas uma vez (em paralelo, um processo por país) na subida do
+# servidor ou no `python -m utils.etl`, e gravadas ao lado do snapshot.
+VIEWS_DIR = SNAPSHOT_PATH.with_suffix(".views")
+VIEW_NAMES = ["ratings", "top", "deck"]
+
+# Visões calculadas pelo próprio servidor (sem o snapshot do ETL), guardadas por
+# versão dos dados e do código de limpeza para o próximo início não refazê-las
+VIEWS_CACHE_DIR = CLEAN_CACHE_DIR.parent / "views"
+VIEWS_CACHE_KEEP = 3
+
+# Processos do pré-cálculo; com 1 (ou numa máquina de 1 núcleo) roda no próprio
+# processo. Com mais, o pool roda num processo `python -m utils.views` à parte:
+# o Streamlit executa cada página como __main__, e os processos de um pool
+# iniciado no servidor importariam (e rodariam) a página.
+PRECOMPUTE_WORKERS = int(os.environ.get("FOME_ZERO_PRECOMPUTE_WORKERS", os.cpu_count() or 1))
+
+# Maior top N do slider da página Culinária. Os TOP_LIST_SIZE melhores de cada
+# (país, culinária) contêm os N melhores de qualquer seleção, com N até esse limite.
+TOP_LIST_SIZE = 500
+TOP_COLUMNS = ["restaurant_id", "restaurant_name", "country", "city", "cuisines", "average_cost_for_two",
+               "aggregate_rating", "votes"]
+VIEW_COLUMNS = [*TOP_COLUMNS, "latitude", "longitude", "currency", "color_name"]
+
+# ===========================================================================================
+#                                       CLASSES
+# ===========================================================================================
+
+class CountryViews:
+    # Cada visão fica em um único frame ("top" e "deck" na ordem das linhas do
+    # dataset, "ratings" por país e culinária), e cada país guarda só as
+    # posições das suas linhas: uma seleção é um único take
+    # com as posições dos países escolhidos (na ordem da seleção), sem copiar
+    # as partes de antemão nem juntar frames intermediários.
+    def __init__(self, views):
+        self.views = views
+        self.positions = {name: {country: np.asarray(rows) for country, rows
+                                 in frame.groupby("country", observed=True).indices.items()}
+                          for name, frame in views.items()}
+
+    def rows(self, name, countries, cuisines=None):
+        parts = [self.positions[name][c] for c in countries if c in self.positions[name]]
+        rows = np.concatenate(parts) if parts else np.empty(0, dtype="int64")
+        if cuisines is not None:
+            # O filtro de culinária só olha a coluna de culinária das linhas já escolhidas
+            column = self.views[name]["cuisines"]
+            codes = column.cat.codes.to_numpy()[rows]
+            rows = rows[np.isin(codes, column.cat.categories.get_indexer(list(cuisines)))]
+        return rows
+
+    def select(self, name, countries, cuisines=None):
+        return self.views[name].take(self.rows(name, countries, cuisines))
+
+    def deck_data(self, countries):
+        # Pontos do mapa pydeck na ordem das linhas do dataset, igual ao deck_data do frame filtrado
+        rows = np.sort(self.rows("deck", countries))
+        return self.views["deck"].drop(columns="country").take(rows).reset_index(drop=True)
+
+    def update(self, df, countries):
+        # Nova versão com as linhas de `countries` recalculadas a partir de `df`
+        # (ex.: países com linhas alteradas por um delta); as demais são reaproveitadas.
+        countries = set(countries)
+        fresh = precompute_views(df.loc[df["country"].isin(countries)]).views
+        views = {}
+        for name in VIEW_NAMES:
+            frame = self.views[name]
+            kept = frame.loc[~frame["country"].isin(countries)]
+            merged = pd.concat([kept, fresh[name]], ignore_index=(name == "ratings"))
+            # Um delta pode trazer categorias novas; as linhas antigas passam a usar as do novo frame
+            views[name] = sort_view(name, merged.astype({col: df[col].dtype for col in merged.columns
+                                                         if col in df.columns
+                                                         and isinstance(df[col].dtype, pd.CategoricalDtype)}))
+        return CountryViews(views)
+
+# ===========================================================================================
+#                                       FUNÇÕES
+# ===========================================================================================
+
+def country_views(df):
+    # Visões de um único país; roda nos processos do pool.
+    return {
+        # Nota máxima por culinária: o máximo das partes é o máximo da seleção
+        "ratings": df[["country", "cuisines", "aggregate_rating"]].groupby(["country", "cuisines"], observed=True)
+                     .max().reset_index(),
+        # Melhores restaurantes de cada culinária, já na ordem do top_k
+        "top": group_top_k(df[TOP_COLUMNS], "cuisines", TOP_LIST_SIZE, "aggregate_rating", "restaurant_id"),
+        # Pontos do mapa pydeck, com o índice das linhas para refazer a ordem original
+        "deck": deck_data(df).set_axis(df.index).assign(country=df["country"]),
+    }
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def precompute_views(df, workers=PRECOMPUTE_WORKERS):
+    if workers > 1 and df["country"].nunique() > 1:
+        return precompute_in_subprocess(df, workers)
+
+    results = [country_views(part) for _, part in df[VIEW_COLUMNS].groupby("country", observed=True)]
+    return join_views(results, df)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def join_views(results, df):
+    views = {}
+    for name in VIEW_NAMES:
+        frames = [result[name] for result in results] or [country_views(df[VIEW_COLUMNS].iloc[:0])[name]]
+        views[name] = sort_view(name, pd.concat(frames, ignore_index=(name == "ratings")))
+    return CountryViews(views)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def sort_view(name, frame):
+    # "top" e "deck" guardam os rótulos das linhas do dataset e voltam à ordem
+    # delas; "ratings" tem uma linha por (país, culinária), sem rótulo de linha
+    if name == "ratings":
+        return frame.sort_values(["country", "cuisines"], ignore_index=True)
+    return frame.sort_index()
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def precompute_in_subprocess(df, workers):
+    # As colunas das visões vão para o processo filho em um Parquet temporário
+    # (com o índice e as categorias) e as visões voltam pelo mesmo diretório.
+    with tempfile.TemporaryDirectory(prefix="fome-zero-views-") as tmp:
+        source = Path(tmp) / "input.parquet"
+        df[VIEW_COLUMNS].to_parquet(source)
+        subprocess.run([sys.executable, "-m", "utils.views", str(source), tmp, "--workers", str(workers)],
+                       check=True, cwd=Path(__file__).resolve().parent.parent)
+        return read_views(tmp)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def pool_views(df, workers):
+    # Um processo por país; roda no `python -m utils.views`, fora do servidor
+    parts = [part for _, part in df[VIEW_COLUMNS].groupby("country", observed=True)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(parts))) as pool:
+        results = list(pool.map(country_views, parts))
+    return join_views(results, df)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def merge_views(views, part):
+    # "top" e "ratings" de duas partes disjuntas do dataset (ex.: blocos do
+    # --stream): a nota máxima da união é o máximo das duas, e os melhores de cada
+    # (país, culinária) da união estão entre os melhores de cada parte.
+    top = pd.concat([views["top"], part["top"]])
+    ratings = pd.concat([views["ratings"], part["ratings"]])
+    return {
+        "top": pd.concat([group_top_k(frame, "cuisines", TOP_LIST_SIZE, "aggregate_rating", "restaurant_id")
+                          for _, frame in top.groupby("country", observed=True)] or [top]),
+        "ratings": ratings.groupby(["country", "cuisines"], observed=True)["aggregate_rating"].max().reset_index(),
+    }
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def write_views(views, path=VIEWS_DIR):
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    for name, frame in views.views.items():
+        # Temporário exclusivo: o dashboard e a API podem gravar as mesmas visões ao mesmo tempo
+        fd, tmp = tempfile.mkstemp(dir=path, prefix=f"{name}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            frame.to_parquet(tmp)
+            publish_file(tmp, path / f"{name}.parquet")
+        finally:
+            Path(tmp).unlink(missing_ok=True)
+    return path
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def read_views(path=VIEWS_DIR):
+    return CountryViews({name: pd.read_parquet(Path(path) / f"{name}.parquet") for name in VIEW_NAMES})
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def views_are_fresh(path=VIEWS_DIR):
+    return DATA_SOURCE != "csv" and snapshot_is_current() and all(
+        snapshot_is_fresh(Path(path) / f"{name}.parquet", SNAPSHOT_PATH) for name in VIEW_NAMES)
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def cached_views_path(version, cache_dir=VIEWS_CACHE_DIR):
+    return Path(cache_dir) / f"{version}-{cleaning_version()}"
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def load_cached_views(version, cache_dir=VIEWS_CACHE_DIR):
+    # Visões guardadas por um início anterior com os mesmos dados, ou None
+    path = cached_views_path(version, cache_dir)
+    if not all((path / f"{name}.parquet").exists() for name in VIEW_NAMES):
+        return None
+    try:
+        return read_views(path)
+    except (OSError, ValueError):
+        return None
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def store_cached_views(views, version, cache_dir=VIEWS_CACHE_DIR):
+    path = write_views(views, cached_views_path(version, cache_dir))
+    # Só as versões mais recentes ficam no disco
+    entries = sorted((p for p in Path(cache_dir).iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in entries[VIEWS_CACHE_KEEP:]:
+        shutil.rmtree(old, ignore_errors=True)
+    return path
+# ------------------------------------------------------------------------------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.views",
+        description="Calcula as visões por país de um Parquet com as colunas das visões (uso interno).",
+    )
+    parser.add_argument("source", type=Path)
+    parser.add_argument("out", type=Path)
+    parser.add_argument("--workers", type=int, default=PRECOMPUTE_WORKERS)
+    args = parser.parse_args(argv)
+    write_views(pool_views(pd.read_parquet(args.source), args.workers), args.out)
+
+
+if __name__ == "__main__":
+    main()